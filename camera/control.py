@@ -1,14 +1,23 @@
 import os
+import sys
+import asyncio
+import fcntl
+import socket
 import requests
 import subprocess
 import signal
 import threading
 import time
 import json
-from datetime import datetime
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
+from aiohttp import web
+
 # Configuration
 SERVER_URL = 'http://your-server-address/upload'
 PHOTO_DIR = '/tmp/photos'
@@ -16,18 +25,165 @@ PHOTO_COUNT = 5
 
 # Remote camera configuration (from stream-lhs.sh)
 REMOTE_HOST = "aura67@100.97.205.28"
+
+# SSH connection multiplexing - the first command establishes a master
+# connection and later ones reuse its control socket, so repeated remote
+# calls skip the TCP+auth handshake
+SSH_CONTROL_PATH = "/tmp/aura_ssh_%r@%h:%p"
+SSH_OPTS = [
+    '-o', f'ControlPath={SSH_CONTROL_PATH}',
+    '-o', 'ControlMaster=auto',
+    '-o', 'ControlPersist=600',
+]
 DEFAULT_WIDTH = 640
 DEFAULT_HEIGHT = 480
 DEFAULT_FRAMERATE = 15
 DEFAULT_BITRATE = 2000000
 HLS_OUTPUT_DIR = "./hls_out"
 HTTP_SERVER_PORT = 8000
+ANALYSIS_FRAME_PATH = "/tmp/latest.jpg"
+
+# Filename timestamps: strftime costs hundreds of microseconds per call
+# (format parse, tz lookup, allocation), so cache the formatted second and
+# take uniqueness from a process-wide counter instead of %f
+_ts_cache = [0, '']
+_ts_counter = itertools.count()
+
+
+def _file_timestamp() -> str:
+    """Second-resolution timestamp plus counter suffix, cached per second"""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[0] = now
+        _ts_cache[1] = time.strftime('%Y%m%d_%H%M%S', time.localtime(now))
+    return f"{_ts_cache[1]}_{next(_ts_counter):04d}"
+
+
+
+class CameraDefaults:
+    """Per-controller default capture settings.
+
+    Slotted so reads in hot capture paths are C-level attribute loads
+    instead of module-dict lookups, and so settings no longer mutate
+    module globals.
+    """
+    __slots__ = ('width', 'height', 'framerate', 'bitrate')
+
+    def __init__(self, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
+                 framerate: int = DEFAULT_FRAMERATE, bitrate: int = DEFAULT_BITRATE):
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.bitrate = bitrate
 
 # Global variables for process management
 _stream_process = None
-_http_server_process = None
+_http_server = None
 _recording_processes = {}
 
+# SIGCHLD watcher - the kernel tells us when a child exits, so the
+# status/cleanup paths only fall back to poll() after a real termination
+# instead of calling waitpid(WNOHANG) on every recording every second.
+# We only set a flag here (never waitpid) so Popen bookkeeping stays intact.
+_child_exited = threading.Event()
+_sigchld_installed = False
+
+
+def _on_sigchld(signum, frame):
+    _child_exited.set()
+
+
+def _install_sigchld_watcher() -> bool:
+    """Install the SIGCHLD handler (main thread only)"""
+    global _sigchld_installed
+    if _sigchld_installed:
+        return True
+    try:
+        signal.signal(signal.SIGCHLD, _on_sigchld)
+        _sigchld_installed = True
+    except (ValueError, OSError):
+        # Not the main thread (e.g. imported from a worker) - cleanup
+        # falls back to unconditional polling
+        _sigchld_installed = False
+    return _sigchld_installed
+
+# Uploader pool - separate processes so TLS/payload framing does not
+# contend with capture work for the GIL
+UPLOAD_WORKERS = 4
+_upload_pool = None
+_worker_session = None
+_worker_server_url = None
+
+class _HlsHttpServer:
+    """In-process aiohttp static server for the HLS output directory"""
+
+    def __init__(self, directory: Path, port: int):
+        self.directory = directory
+        self.port = port
+        self._loop = None
+        self._thread = None
+        self._runner = None
+        self._started = threading.Event()
+        self._failed = False
+
+    @staticmethod
+    @web.middleware
+    async def _cache_headers(request, handler):
+        """Keep playlists fresh while letting clients cache immutable segments"""
+        response = await handler(request)
+        if request.path.endswith(('.m3u8', '.mp4')):
+            response.headers['Cache-Control'] = 'no-cache'
+        elif request.path.endswith(('.ts', '.m4s')):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    async def _start_site(self):
+        app = web.Application(middlewares=[self._cache_headers])
+        # aiohttp serves static files via os.sendfile when available, so
+        # segment bytes move page-cache -> socket without entering Python;
+        # the large chunk_size only matters on the read/write fallback path.
+        app.router.add_static('/', self.directory, show_index=False,
+                              chunk_size=256 * 1024)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        site = web.TCPSite(self._runner, '0.0.0.0', self.port,
+                           reuse_port=reuse_port)
+        await site.start()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._start_site())
+        except Exception as e:
+            print(f"Error starting HTTP server: {e}")
+            self._failed = True
+            self._started.set()
+            self._loop.close()
+            return
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def start(self) -> bool:
+        """Start serving; returns once the listening socket is ready"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+        return not self._failed
+
+    def stop(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
 class CameraController:
     """Enhanced camera controller with streaming capabilities"""
     
@@ -35,51 +191,49 @@ class CameraController:
         self.remote_host = remote_host
         self.output_dir = Path(HLS_OUTPUT_DIR)
         self.output_dir.mkdir(exist_ok=True)
+        self._mjpeg_proc = None
+        self._mjpeg_buffer = bytearray()
+        self._mjpeg_lock = threading.Lock()
+        self._stream_status_cache = (0.0, None)
+        self._defaults = CameraDefaults()
+        self._frame_buffer = None
+        self._frame_buffer_thread = None
+        self._frame_buffer_stop = threading.Event()
+        _install_sigchld_watcher()
         
     def start_http_server(self, port: int = HTTP_SERVER_PORT) -> bool:
-        """Start HTTP server to serve HLS stream"""
-        global _http_server_process
-        
-        if _http_server_process and _http_server_process.poll() is None:
+        """Start in-process HTTP server to serve HLS stream"""
+        global _http_server
+
+        if _http_server and _http_server.running:
             print(f"HTTP server already running on port {port}")
             return True
-            
+
         try:
-            _http_server_process = subprocess.Popen([
-                'python3', '-m', 'http.server', 
-                '--directory', str(self.output_dir),
-                str(port)
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
-            # Give server time to start
-            time.sleep(1)
-            
-            if _http_server_process.poll() is None:
+            server = _HlsHttpServer(self.output_dir, port)
+
+            if server.start():
+                _http_server = server
                 print(f"HTTP server started on port {port}")
                 print(f"Stream available at: http://localhost:{port}/stream.m3u8")
                 return True
             else:
                 print("Failed to start HTTP server")
                 return False
-                
+
         except Exception as e:
             print(f"Error starting HTTP server: {e}")
             return False
-    
+
     def stop_http_server(self) -> bool:
         """Stop the HTTP server"""
-        global _http_server_process
-        
-        if _http_server_process and _http_server_process.poll() is None:
+        global _http_server
+
+        if _http_server and _http_server.running:
             try:
-                _http_server_process.terminate()
-                _http_server_process.wait(timeout=5)
+                _http_server.stop()
                 print("HTTP server stopped")
                 return True
-            except subprocess.TimeoutExpired:
-                _http_server_process.kill()
-                print("HTTP server force killed")
-                return True
             except Exception as e:
                 print(f"Error stopping HTTP server: {e}")
                 return False
@@ -87,11 +241,61 @@ class CameraController:
             print("HTTP server not running")
             return True
     
-    def start_stream(self, width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
-                    framerate: int = DEFAULT_FRAMERATE, bitrate: int = DEFAULT_BITRATE,
-                    segment_duration: float = 0.5, playlist_size: int = 6) -> bool:
+    @staticmethod
+    def _spawn_ssh_ffmpeg(ssh_cmd: List[str], ffmpeg_cmd: List[str],
+                          log_path: str = None) -> Tuple[subprocess.Popen, subprocess.Popen]:
+        """Spawn an SSH producer piped into an FFmpeg consumer.
+
+        The two processes share a raw kernel pipe, so the H.264 bytes move
+        kernel-to-kernel without this process ever owning the data path.
+        """
+        read_fd, write_fd = os.pipe()
+
+        # Size the pipe buffer to roughly one GOP so short bursts from the
+        # camera don't stall FFmpeg (Linux only; best effort elsewhere)
+        if hasattr(fcntl, 'F_SETPIPE_SZ'):
+            try:
+                fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, 1 << 20)
+            except OSError:
+                pass
+
+        try:
+            ssh_process = subprocess.Popen(ssh_cmd, stdout=write_fd)
+        finally:
+            os.close(write_fd)
+
+        # FFmpeg logs go to a file, never an undrained PIPE - once a 64KB
+        # pipe buffer fills, ffmpeg blocks on write(2) and the whole HLS
+        # pipeline stalls
+        if log_path:
+            stderr_target = open(log_path, 'ab', buffering=0)
+        else:
+            stderr_target = subprocess.DEVNULL
+
+        try:
+            ffmpeg_process = subprocess.Popen(
+                ffmpeg_cmd,
+                stdin=read_fd,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_target
+            )
+        finally:
+            os.close(read_fd)
+            if stderr_target is not subprocess.DEVNULL:
+                stderr_target.close()
+
+        return ssh_process, ffmpeg_process
+
+    def start_stream(self, width: int = None, height: int = None,
+                    framerate: int = None, bitrate: int = None,
+                    segment_duration: float = 0.2, playlist_size: int = 6) -> bool:
         """Start video streaming from remote camera"""
         global _stream_process
+        defaults = self._defaults
+        width = width if width is not None else defaults.width
+        height = height if height is not None else defaults.height
+        framerate = framerate if framerate is not None else defaults.framerate
+        bitrate = bitrate if bitrate is not None else defaults.bitrate
         
         if _stream_process and _stream_process.poll() is None:
             print("Stream already running")
@@ -107,7 +311,7 @@ class CameraController:
             
             # SSH command for remote camera
             ssh_cmd = [
-                'ssh', self.remote_host,
+                'ssh', *SSH_OPTS, self.remote_host,
                 f'libcamera-vid -t 0 --codec h264 --inline '
                 f'--framerate {framerate} --intra {intra} '
                 f'--width {width} --height {height} '
@@ -120,6 +324,9 @@ class CameraController:
                 '-fflags', '+genpts+nobuffer',
                 '-flags', 'low_delay',
                 '-probesize', '32', '-analyzeduration', '0',
+                # Absorb transient SSH jitter on the input side instead of
+                # stalling/re-initialising the demuxer
+                '-rtbufsize', '32M', '-thread_queue_size', '1024',
                 '-f', 'h264', '-r', str(framerate), '-i', 'pipe:0',
                 '-c:v', 'copy',
                 '-flush_packets', '1',
@@ -127,29 +334,48 @@ class CameraController:
                 '-f', 'hls',
                 '-hls_time', str(segment_duration),
                 '-hls_list_size', str(playlist_size),
-                '-hls_flags', 'delete_segments+append_list+independent_segments+omit_endlist+discont_start',
-                '-hls_segment_type', 'mpegts',
-                '-hls_segment_filename', f'{self.output_dir}/stream_%03d.ts',
-                f'{self.output_dir}/stream.m3u8'
+                '-hls_flags', 'delete_segments+append_list+independent_segments+omit_endlist+discont_start+program_date_time',
+                '-hls_segment_type', 'fmp4',
+                '-hls_fmp4_init_filename', 'init.mp4',
+                '-hls_segment_filename', f'{self.output_dir}/stream_%03d.m4s',
+                f'{self.output_dir}/stream.m3u8',
+                # Second output: keep a continuously refreshed JPEG so analysis
+                # frames reuse the already-flowing stream instead of re-fetching
+                # and re-decoding the HLS playlist in a new subprocess
+                '-map', '0:v', '-c:v', 'mjpeg', '-q:v', '3',
+                '-vf', 'fps=2', '-update', '1',
+                '-f', 'image2', ANALYSIS_FRAME_PATH
             ]
             
-            # Start SSH process
-            ssh_process = subprocess.Popen(ssh_cmd, stdout=subprocess.PIPE)
-            
-            # Start FFmpeg process
-            _stream_process = subprocess.Popen(
-                ffmpeg_cmd, 
-                stdin=ssh_process.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Close SSH stdout to allow proper pipe handling
-            ssh_process.stdout.close()
-            
-            # Give processes time to start
-            time.sleep(2)
-            
+            # Clear leftovers from a previous session first: stop_stream
+            # leaves stream.m3u8 behind (delete_segments only prunes
+            # during the run), and a stale playlist would satisfy the
+            # readiness check below instantly - reporting success for a
+            # pipeline that dies moments later
+            playlist = self.output_dir / "stream.m3u8"
+            playlist.unlink(missing_ok=True)
+            with os.scandir(self.output_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("stream_") and name.endswith((".m4s", ".ts")):
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+
+            # Start SSH piped directly into FFmpeg
+            ssh_process, _stream_process = self._spawn_ssh_ffmpeg(
+                ssh_cmd, ffmpeg_cmd, log_path='/tmp/ffmpeg_stream.log')
+
+            # Wait for the muxer to produce a playlist instead of sleeping a
+            # fixed 2s - ready as soon as output appears, and failures surface
+            # as soon as FFmpeg exits
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                if _stream_process.poll() is not None or playlist.exists():
+                    break
+                time.sleep(0.05)
+
             if _stream_process.poll() is None:
                 print(f"Stream started successfully")
                 print(f"Resolution: {width}x{height}")
@@ -190,41 +416,156 @@ class CameraController:
             
         return success
     
-    def get_stream_status(self) -> Dict:
-        """Get current stream status"""
-        global _stream_process, _http_server_process
-        
+    def get_stream_status(self, ttl: float = 0.1) -> Dict:
+        """Get current stream status (cached briefly for hot polling loops)"""
+        global _stream_process, _http_server
+
+        now = time.monotonic()
+        cached_at, cached = self._stream_status_cache
+        if cached is not None and now - cached_at < ttl:
+            return cached
+
         status = {
             'streaming': _stream_process is not None and _stream_process.poll() is None,
-            'http_server': _http_server_process is not None and _http_server_process.poll() is None,
+            'http_server': _http_server is not None and _http_server.running,
             'output_dir': str(self.output_dir),
-            'stream_url': f"http://localhost:{HTTP_SERVER_PORT}/stream.m3u8" if _http_server_process else None
+            'stream_url': f"http://localhost:{HTTP_SERVER_PORT}/stream.m3u8" if _http_server else None
         }
         
-        # Check for HLS files
+        # Check for HLS files - one scandir pass tracks the count and the
+        # newest segment together, using the DirEntry stat cache instead of
+        # globbing twice and re-stat()ing every file
         if self.output_dir.exists():
-            m3u8_file = self.output_dir / "stream.m3u8"
-            ts_files = list(self.output_dir.glob("stream_*.ts"))
-            
+            playlist_exists = False
+            segment_count = 0
+            latest_segment = None
+            latest_mtime = -1.0
+            with os.scandir(self.output_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name == "stream.m3u8":
+                        playlist_exists = True
+                    elif name.startswith("stream_") and name.endswith((".m4s", ".ts")):
+                        segment_count += 1
+                        mtime = entry.stat().st_mtime
+                        if mtime > latest_mtime:
+                            latest_mtime = mtime
+                            latest_segment = name
+
             status.update({
-                'playlist_exists': m3u8_file.exists(),
-                'segment_count': len(ts_files),
-                'latest_segment': max(ts_files, key=lambda f: f.stat().st_mtime).name if ts_files else None
+                'playlist_exists': playlist_exists,
+                'segment_count': segment_count,
+                'latest_segment': latest_segment
             })
-        
+
+        self._stream_status_cache = (now, status)
         return status
     
-    def capture_frame(self, output_path: str = None, width: int = DEFAULT_WIDTH, 
-                     height: int = DEFAULT_HEIGHT) -> Optional[str]:
+    def start_mjpeg_stream(self, width: int = None, height: int = None,
+                           framerate: int = None) -> bool:
+        """Start a persistent MJPEG stream so frame grabs skip SSH and camera warm-up"""
+        defaults = self._defaults
+        width = width if width is not None else defaults.width
+        height = height if height is not None else defaults.height
+        framerate = framerate if framerate is not None else defaults.framerate
+        if self._mjpeg_proc and self._mjpeg_proc.poll() is None:
+            print("MJPEG stream already running")
+            return True
+
+        try:
+            ssh_cmd = [
+                'ssh', *SSH_OPTS, self.remote_host,
+                f'libcamera-vid -t 0 --codec mjpeg --framerate {framerate} '
+                f'--width {width} --height {height} --nopreview -o -'
+            ]
+            self._mjpeg_proc = subprocess.Popen(
+                ssh_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0
+            )
+            self._mjpeg_buffer = bytearray()
+            print("MJPEG stream started")
+            return True
+
+        except Exception as e:
+            print(f"Error starting MJPEG stream: {e}")
+            return False
+
+    def stop_mjpeg_stream(self) -> bool:
+        """Stop the persistent MJPEG stream"""
+        if self._mjpeg_proc and self._mjpeg_proc.poll() is None:
+            try:
+                self._mjpeg_proc.terminate()
+                self._mjpeg_proc.wait(timeout=5)
+                print("MJPEG stream stopped")
+                return True
+            except subprocess.TimeoutExpired:
+                self._mjpeg_proc.kill()
+                print("MJPEG stream force killed")
+                return True
+            except Exception as e:
+                print(f"Error stopping MJPEG stream: {e}")
+                return False
+        return True
+
+    def close_ssh_master(self) -> None:
+        """Tear down the shared SSH master connection if one is open.
+
+        The ControlMaster socket is shared process-wide, so this must
+        only run from an explicit process-lifecycle hook (e.g. an
+        atexit registration) - never from per-instance cleanup, since
+        throwaway controllers are constructed all over (take_photos,
+        quick_capture, test probes) and tearing the master down when
+        one of them is collected would cut the multiplexed SSH session
+        under a live stream or recording.
+        """
+        try:
+            subprocess.run(
+                ['ssh', *SSH_OPTS, '-O', 'exit', self.remote_host],
+                capture_output=True, timeout=5
+            )
+        except Exception:
+            pass
+
+    def _read_mjpeg_frame(self, max_reads: int = 256) -> Optional[bytes]:
+        """Read the next SOI/EOI-delimited JPEG from the persistent stream"""
+        with self._mjpeg_lock:
+            buf = self._mjpeg_buffer
+            for _ in range(max_reads):
+                start = buf.find(b'\xff\xd8')
+                if start != -1:
+                    end = buf.find(b'\xff\xd9', start + 2)
+                    if end != -1:
+                        frame = bytes(buf[start:end + 2])
+                        del buf[:end + 2]
+                        return frame
+                chunk = self._mjpeg_proc.stdout.read(65536)
+                if not chunk:
+                    return None
+                buf.extend(chunk)
+            return None
+
+    def capture_frame(self, output_path: str = None, width: int = None,
+                     height: int = None) -> Optional[str]:
         """Capture a single frame from remote camera"""
+        defaults = self._defaults
+        width = width if width is not None else defaults.width
+        height = height if height is not None else defaults.height
         if output_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"/tmp/frame_{timestamp}.jpg"
-        
+            output_path = f"/tmp/frame_{_file_timestamp()}.jpg"
+
+        # Pull from the persistent MJPEG stream when it is running - skips
+        # the per-frame SSH handshake and camera warm-up entirely
+        if self._mjpeg_proc and self._mjpeg_proc.poll() is None:
+            frame = self._read_mjpeg_frame()
+            if frame:
+                with open(output_path, 'wb') as f:
+                    f.write(frame)
+                print(f"Frame captured: {output_path}")
+                return output_path
+
         try:
             # SSH command for single frame capture
             ssh_cmd = [
-                'ssh', self.remote_host,
+                'ssh', *SSH_OPTS, self.remote_host,
                 f'libcamera-jpeg --width {width} --height {height} '
                 f'--nopreview --immediate -o -'
             ]
@@ -246,36 +587,161 @@ class CameraController:
             print(f"Error capturing frame: {e}")
             return None
     
+    async def _capture_frame_async(self, output_path: str = None, width: int = None,
+                                   height: int = None) -> Optional[str]:
+        """Capture a single frame from remote camera without blocking the caller thread"""
+        defaults = self._defaults
+        width = width if width is not None else defaults.width
+        height = height if height is not None else defaults.height
+        if output_path is None:
+            output_path = f"/tmp/frame_{_file_timestamp()}.jpg"
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'ssh', *SSH_OPTS, self.remote_host,
+                f'libcamera-jpeg --width {width} --height {height} '
+                f'--nopreview --immediate -o -',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+
+            if proc.returncode == 0:
+                with open(output_path, 'wb') as f:
+                    f.write(stdout)
+                print(f"Frame captured: {output_path}")
+                return output_path
+            else:
+                print(f"Failed to capture frame: {stderr.decode()}")
+                return None
+
+        except Exception as e:
+            print(f"Error capturing frame: {e}")
+            return None
+
+    async def _extract_stream_frame_async(self, output_path: str) -> Optional[str]:
+        """Extract one frame from the live stream without blocking the caller thread"""
+        ffmpeg_cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-i', f'http://localhost:{HTTP_SERVER_PORT}/stream.m3u8',
+            '-vframes', '1',
+            '-q:v', '2',
+            output_path
+        ]
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *ffmpeg_cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
+
+            if proc.returncode == 0 and os.path.exists(output_path):
+                return output_path
+            print(f"Failed to capture frame: {stderr.decode()}")
+            return None
+
+        except asyncio.TimeoutError:
+            print("Timeout capturing frame")
+            return None
+        except Exception as e:
+            print(f"Error capturing frame: {e}")
+            return None
+
+    async def capture_frames_async(self, count: int = 1,
+                                   output_dir: str = "/tmp/frames") -> List[str]:
+        """Capture multiple frames concurrently by overlapping the SSH round-trips"""
+        os.makedirs(output_dir, exist_ok=True)
+        output_paths = []
+        for i in range(count):
+            output_paths.append(os.path.join(output_dir, f"frame_{_file_timestamp()}.jpg"))
+
+        if self.get_stream_status()['streaming']:
+            tasks = [self._extract_stream_frame_async(p) for p in output_paths]
+        else:
+            tasks = [self._capture_frame_async(p) for p in output_paths]
+
+        results = await asyncio.gather(*tasks)
+        return [path for path in results if path]
+
+    def _drain_buffered_frames(self, count: int, idle_wait: float = 0.05,
+                               timeout: float = None) -> List[str]:
+        """Burst-drain frames from the background buffer.
+
+        Takes every frame the producer has queued before sleeping, and
+        only sleeps (briefly) when the buffer is empty - so a burst of
+        frames is consumed at memory speed instead of one per loop
+        tick. The buffer's maxlen already drops the oldest frames if
+        this consumer falls behind.
+        """
+        if timeout is None:
+            timeout = 10.0 * count
+        captured = []
+        buffer = self._frame_buffer
+        deadline = time.monotonic() + timeout
+
+        while len(captured) < count and time.monotonic() < deadline:
+            drained = False
+            while buffer and len(captured) < count:
+                try:
+                    captured.append(buffer.popleft())
+                    drained = True
+                except IndexError:
+                    break
+            if not drained:
+                time.sleep(idle_wait)
+
+        return captured
+
     def capture_frames_from_stream(self, count: int = 1, interval: float = 1.0,
                                   output_dir: str = "/tmp/frames") -> List[str]:
         """Capture multiple frames from the current stream"""
         os.makedirs(output_dir, exist_ok=True)
+
+        # A running frame buffer already has frames in flight: drain it
+        # instead of spawning fresh ffmpeg extractions per frame
+        if self._frame_buffer_thread and self._frame_buffer_thread.is_alive():
+            return self._drain_buffered_frames(count)
+
+        # No pacing requested: overlap the per-frame subprocesses instead of
+        # paying the SSH/ffmpeg round-trip serially for each frame
+        if interval <= 0 and count > 1:
+            return asyncio.run(self.capture_frames_async(count, output_dir))
+
         captured_frames = []
-        
+
+        # Bind hot lookups to locals: LOAD_FAST in the per-frame loop is
+        # about half the cost of repeated LOAD_GLOBAL + LOAD_ATTR
+        run = subprocess.run
+        join = os.path.join
+        exists = os.path.exists
+        sleep = time.sleep
+        playlist_url = f'http://localhost:{HTTP_SERVER_PORT}/stream.m3u8'
+
         for i in range(count):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            output_path = os.path.join(output_dir, f"frame_{timestamp}.jpg")
-            
+            output_path = join(output_dir, f"frame_{_file_timestamp()}.jpg")
+
             try:
                 # Use ffmpeg to extract frame from stream
                 ffmpeg_cmd = [
                     'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
-                    '-i', f'http://localhost:{HTTP_SERVER_PORT}/stream.m3u8',
+                    '-i', playlist_url,
                     '-vframes', '1',
                     '-q:v', '2',  # High quality
                     output_path
                 ]
-                
-                result = subprocess.run(ffmpeg_cmd, capture_output=True, timeout=10)
-                
-                if result.returncode == 0 and os.path.exists(output_path):
+
+                result = run(ffmpeg_cmd, capture_output=True, timeout=10)
+
+                if result.returncode == 0 and exists(output_path):
                     captured_frames.append(output_path)
                     print(f"Frame {i+1}/{count} captured: {output_path}")
                 else:
                     print(f"Failed to capture frame {i+1}: {result.stderr.decode()}")
                     
                 if i < count - 1:  # Don't sleep after last frame
-                    time.sleep(interval)
+                    sleep(interval)
                     
             except subprocess.TimeoutExpired:
                 print(f"Timeout capturing frame {i+1}")
@@ -284,70 +750,149 @@ class CameraController:
         
         return captured_frames
     
+    def start_frame_buffer(self, interval: float = 0.5, buffer_size: int = 1) -> bool:
+        """Start a background thread that keeps the newest stream frames buffered.
+
+        The producer loops frame extraction off the live stream into a
+        bounded deque (oldest frames are dropped), so consumers grab
+        the latest frame with get_latest_frame() instead of paying the
+        ffmpeg round-trip on their own thread. buffer_size=1 keeps
+        only the freshest frame; larger values keep a short history.
+        """
+        if self._frame_buffer_thread and self._frame_buffer_thread.is_alive():
+            print("Frame buffer already running")
+            return True
+
+        if not self.get_stream_status()['streaming']:
+            print("Cannot start frame buffer: stream is not running")
+            return False
+
+        self._frame_buffer = deque(maxlen=buffer_size)
+        self._frame_buffer_stop.clear()
+
+        def _producer():
+            while not self._frame_buffer_stop.is_set():
+                output_path = f"/tmp/buffered_frame_{_file_timestamp()}.jpg"
+                try:
+                    result = subprocess.run([
+                        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                        '-i', f'http://localhost:{HTTP_SERVER_PORT}/stream.m3u8',
+                        '-vframes', '1',
+                        '-q:v', '2',
+                        output_path
+                    ], capture_output=True, timeout=10)
+                    if result.returncode == 0 and os.path.exists(output_path):
+                        # deque.append is thread-safe; maxlen drops the
+                        # oldest frame when the consumer falls behind
+                        self._frame_buffer.append(output_path)
+                except subprocess.TimeoutExpired:
+                    pass
+                except Exception as e:
+                    print(f"Frame buffer error: {e}")
+                self._frame_buffer_stop.wait(interval)
+
+        self._frame_buffer_thread = threading.Thread(target=_producer, daemon=True)
+        self._frame_buffer_thread.start()
+        print(f"Frame buffer started (size={buffer_size}, interval={interval}s)")
+        return True
+
+    def get_latest_frame(self) -> Optional[str]:
+        """Return the newest buffered frame path without blocking (None if empty)"""
+        buffer = self._frame_buffer
+        if not buffer:
+            return None
+        try:
+            return buffer[-1]
+        except IndexError:
+            return None
+
+    def stop_frame_buffer(self) -> bool:
+        """Stop the background frame buffer thread"""
+        thread = self._frame_buffer_thread
+        if not thread or not thread.is_alive():
+            return True
+        self._frame_buffer_stop.set()
+        thread.join(timeout=12)
+        self._frame_buffer_thread = None
+        print("Frame buffer stopped")
+        return True
+
     def capture_frame_for_analysis(self, width: int = 640, height: int = 480) -> Optional[str]:
         """Capture a frame optimized for object detection analysis"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"/tmp/analysis_frame_{timestamp}.jpg"
-        
-        # If stream is running, capture from stream for better quality
-        if self.get_stream_status()['streaming']:
-            frames = self.capture_frames_from_stream(count=1, output_dir="/tmp")
-            return frames[0] if frames else None
-        else:
-            # Capture direct from camera
-            return self.capture_frame(output_path, width, height)
+        # If stream is running, the main FFmpeg pipeline already tees the
+        # latest decoded frame to disk - just hand that file back
+        if self.get_stream_status()['streaming'] and os.path.exists(ANALYSIS_FRAME_PATH):
+            return ANALYSIS_FRAME_PATH
+
+        # Capture direct from camera
+        output_path = f"/tmp/analysis_frame_{_file_timestamp()}.jpg"
+        return self.capture_frame(output_path, width, height)
     
     def start_recording(self, duration: int = 30, output_path: str = None,
-                       width: int = DEFAULT_WIDTH, height: int = DEFAULT_HEIGHT,
-                       framerate: int = DEFAULT_FRAMERATE, bitrate: int = DEFAULT_BITRATE) -> Optional[str]:
+                       width: int = None, height: int = None,
+                       framerate: int = None, bitrate: int = None) -> Optional[str]:
         """Start recording a video segment"""
-        global _recording_processes
+        global _recording_processes, _stream_process
+        defaults = self._defaults
+        width = width if width is not None else defaults.width
+        height = height if height is not None else defaults.height
+        framerate = framerate if framerate is not None else defaults.framerate
+        bitrate = bitrate if bitrate is not None else defaults.bitrate
         
         if output_path is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"/tmp/recording_{timestamp}.mp4"
+            output_path = f"/tmp/recording_{_file_timestamp()}.mp4"
         
         # Generate unique recording ID
         recording_id = f"rec_{int(time.time())}"
         
         try:
-            # SSH command for remote camera
-            ssh_cmd = [
-                'ssh', self.remote_host,
-                f'libcamera-vid -t {duration * 1000} --codec h264 '
-                f'--framerate {framerate} --width {width} --height {height} '
-                f'--bitrate {bitrate} --nopreview -o -'
-            ]
-            
-            # FFmpeg command for recording
-            ffmpeg_cmd = [
-                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning',
-                '-f', 'h264', '-i', 'pipe:0',
-                '-c:v', 'copy',
-                '-movflags', '+faststart',
-                output_path
-            ]
-            
-            # Start SSH process
-            ssh_process = subprocess.Popen(ssh_cmd, stdout=subprocess.PIPE)
-            
-            # Start FFmpeg process
-            ffmpeg_process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdin=ssh_process.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Close SSH stdout
-            ssh_process.stdout.close()
-            
+            if _stream_process and _stream_process.poll() is None:
+                # The live HLS muxer is already running: remux its local
+                # playlist instead of paying a second SSH session, camera
+                # pipeline and codec init per recording
+                ffmpeg_cmd = [
+                    'ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning',
+                    '-live_start_index', '-1',
+                    '-i', f'{self.output_dir}/stream.m3u8',
+                    '-t', str(duration),
+                    '-c', 'copy',
+                    '-movflags', '+faststart',
+                    output_path
+                ]
+                ffmpeg_process = subprocess.Popen(
+                    ffmpeg_cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+                ssh_process = None
+            else:
+                # SSH command for remote camera
+                ssh_cmd = [
+                    'ssh', *SSH_OPTS, self.remote_host,
+                    f'libcamera-vid -t {duration * 1000} --codec h264 '
+                    f'--framerate {framerate} --width {width} --height {height} '
+                    f'--bitrate {bitrate} --nopreview -o -'
+                ]
+
+                # FFmpeg command for recording
+                ffmpeg_cmd = [
+                    'ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning',
+                    '-f', 'h264', '-i', 'pipe:0',
+                    '-c:v', 'copy',
+                    '-movflags', '+faststart',
+                    output_path
+                ]
+
+                # Start SSH piped directly into FFmpeg
+                ssh_process, ffmpeg_process = self._spawn_ssh_ffmpeg(
+                    ssh_cmd, ffmpeg_cmd, log_path=f'/tmp/ffmpeg_{recording_id}.log')
+
             # Store process info
             _recording_processes[recording_id] = {
                 'ssh_process': ssh_process,
                 'ffmpeg_process': ffmpeg_process,
                 'output_path': output_path,
-                'start_time': time.time(),
+                'start_time': time.monotonic(),
                 'duration': duration
             }
             
@@ -378,7 +923,7 @@ class CameraController:
                 rec_info['ffmpeg_process'].wait(timeout=10)
             
             # Stop SSH process
-            if rec_info['ssh_process'].poll() is None:
+            if rec_info['ssh_process'] and rec_info['ssh_process'].poll() is None:
                 rec_info['ssh_process'].terminate()
                 rec_info['ssh_process'].wait(timeout=5)
             
@@ -394,57 +939,97 @@ class CameraController:
             print(f"Error stopping recording {recording_id}: {e}")
             return False
     
+    def wait_for_recording(self, recording_id: str, timeout: float = None) -> bool:
+        """Block until a recording finishes (single wait syscall, no polling)"""
+        global _recording_processes
+
+        rec_info = _recording_processes.get(recording_id)
+        if rec_info is None:
+            print(f"Recording {recording_id} not found")
+            return False
+
+        try:
+            rec_info['ffmpeg_process'].wait(timeout=timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    @staticmethod
+    def _snapshot() -> Dict:
+        """Poll every recording once and return {rid: (rec_info, returncode)}"""
+        return {
+            rid: (rec_info, rec_info['ffmpeg_process'].poll())
+            for rid, rec_info in _recording_processes.items()
+        }
+
+    @staticmethod
+    def _recording_status(recording_id: str, rec_info: Dict, returncode=None) -> Dict:
+        """Build the status dict for a single recording from a polled returncode"""
+        elapsed = time.monotonic() - rec_info['start_time']
+        remaining = max(0, rec_info['duration'] - elapsed)
+
+        return {
+            'recording_id': recording_id,
+            'output_path': rec_info['output_path'],
+            'elapsed_time': elapsed,
+            'remaining_time': remaining,
+            'is_active': returncode is None,
+            'progress_percent': min(100, (elapsed / rec_info['duration']) * 100)
+        }
+
     def get_recording_status(self, recording_id: str = None) -> Dict:
         """Get status of recordings"""
         global _recording_processes
-        
+
         if recording_id:
             # Get specific recording status
             if recording_id not in _recording_processes:
                 return {'error': f'Recording {recording_id} not found'}
-            
+
             rec_info = _recording_processes[recording_id]
-            elapsed = time.time() - rec_info['start_time']
-            remaining = max(0, rec_info['duration'] - elapsed)
-            
-            return {
-                'recording_id': recording_id,
-                'output_path': rec_info['output_path'],
-                'elapsed_time': elapsed,
-                'remaining_time': remaining,
-                'is_active': rec_info['ffmpeg_process'].poll() is None,
-                'progress_percent': min(100, (elapsed / rec_info['duration']) * 100)
-            }
+            return self._recording_status(
+                recording_id, rec_info, rec_info['ffmpeg_process'].poll())
         else:
-            # Get all recordings status
+            # One poll per recording, then build everything from the snapshot
+            snapshot = self._snapshot()
             return {
-                'active_recordings': len(_recording_processes),
+                'active_recordings': len(snapshot),
                 'recordings': {
-                    rid: self.get_recording_status(rid) 
-                    for rid in _recording_processes.keys()
+                    rid: self._recording_status(rid, rec_info, returncode)
+                    for rid, (rec_info, returncode) in snapshot.items()
                 }
             }
-    
+
     def cleanup_finished_recordings(self) -> int:
         """Remove finished recordings from process list"""
         global _recording_processes
-        
-        finished = []
-        for recording_id, rec_info in _recording_processes.items():
-            if rec_info['ffmpeg_process'].poll() is not None:
-                finished.append(recording_id)
-        
+
+        if not _recording_processes:
+            return 0
+
+        # With the SIGCHLD watcher installed we only need to poll after a
+        # child has actually exited; otherwise nothing can be finished yet
+        if _sigchld_installed and not _child_exited.is_set():
+            return 0
+        _child_exited.clear()
+
+        finished = [
+            recording_id
+            for recording_id, (_, returncode) in self._snapshot().items()
+            if returncode is not None
+        ]
+
         for recording_id in finished:
             del _recording_processes[recording_id]
             print(f"Cleaned up finished recording: {recording_id}")
-        
+
         return len(finished)
     
     def test_camera_connection(self) -> bool:
         """Test connection to remote camera"""
         try:
             result = subprocess.run([
-                'ssh', '-o', 'ConnectTimeout=5', self.remote_host, 
+                'ssh', *SSH_OPTS, '-o', 'ConnectTimeout=5', self.remote_host,
                 'echo "Camera connection test"'
             ], capture_output=True, timeout=10)
             
@@ -463,7 +1048,7 @@ class CameraController:
         """Get camera capabilities and information"""
         try:
             result = subprocess.run([
-                'ssh', self.remote_host, 
+                'ssh', *SSH_OPTS, self.remote_host, 
                 'libcamera-hello --list-cameras'
             ], capture_output=True, timeout=10)
             
@@ -490,55 +1075,95 @@ class CameraController:
             }
     
     def set_camera_settings(self, settings: Dict) -> bool:
-        """Apply camera settings for next operation"""
-        # This would update the default settings for subsequent operations
-        valid_settings = ['width', 'height', 'framerate', 'bitrate']
-        
+        """Apply camera settings for subsequent operations"""
         for key, value in settings.items():
-            if key in valid_settings:
-                globals()[f'DEFAULT_{key.upper()}'] = value
+            if key in CameraDefaults.__slots__:
+                setattr(self._defaults, key, value)
                 print(f"Updated {key}: {value}")
             else:
                 print(f"Invalid setting: {key}")
                 return False
-        
+
         return True
 
 # Legacy functions updated to work with new system
-def take_photos(count=PHOTO_COUNT, save_dir=PHOTO_DIR):
-    """Legacy function updated to use remote camera"""
+def take_photos(count=PHOTO_COUNT, save_dir=PHOTO_DIR, cancel_event=None):
+    """Legacy function updated to use remote camera.
+
+    If cancel_event (a threading.Event) is set between captures the
+    remaining photos are skipped and the paths taken so far returned.
+    """
     controller = CameraController()
-    
+
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
-    
+
     photo_paths = []
-    
-    for i in range(count):
-        photo_path = os.path.join(save_dir, f'photo_{i+1}.jpg')
-        captured_path = controller.capture_frame(photo_path)
-        
-        if captured_path:
-            photo_paths.append(captured_path)
-            print(f"Captured photo {i+1}/{count}")
-        else:
-            print(f"Failed to capture photo {i+1}")
-        
-        if i < count - 1:  # Don't sleep after last photo
-            time.sleep(1)
-    
+
+    join = os.path.join
+    capture = controller.capture_frame
+
+    # Pipeline each capture+save against the pacing sleep: a worker runs
+    # photo i while the main thread waits out the interval, so a scan
+    # costs roughly max(capture, interval) per photo instead of their
+    # sum. One worker per four cores keeps captures serial on the
+    # camera and leaves cores free for the server.
+    workers = max(1, (os.cpu_count() or 4) // 4)
+    pending = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(count):
+            if cancel_event is not None and cancel_event.is_set():
+                print(f"Photo capture cancelled after {i}/{count} photos")
+                break
+            pending.append((i, pool.submit(capture, join(save_dir, f'photo_{i+1}.jpg'))))
+
+            if i < count - 1:  # Don't sleep after last photo
+                time.sleep(1)
+
+        for i, future in pending:
+            captured_path = future.result()
+
+            if captured_path:
+                photo_paths.append(captured_path)
+                print(f"Captured photo {i+1}/{count}")
+            else:
+                print(f"Failed to capture photo {i+1}")
+
     return photo_paths
 
-def send_photos(photo_paths, server_url=SERVER_URL):
-    """Send photos to server - unchanged from original"""
-    for photo_path in photo_paths:
+def _upload_worker_init(server_url):
+    """Give each uploader process its own keep-alive session"""
+    global _worker_session, _worker_server_url
+    _worker_session = requests.Session()
+    _worker_server_url = server_url
+
+def _upload_one(photo_path):
+    """Upload a single photo from an uploader process"""
+    try:
         with open(photo_path, 'rb') as f:
-            files = {'photo': f}
-            response = requests.post(server_url, files=files)
-            if response.status_code == 200:
-                print(f"Uploaded {photo_path} successfully.")
-            else:
-                print(f"Failed to upload {photo_path}: {response.status_code}")
+            response = _worker_session.post(_worker_server_url, files={'photo': f})
+        return photo_path, response.status_code
+    except Exception as e:
+        print(f"Error uploading {photo_path}: {e}")
+        return photo_path, None
+
+def _get_upload_pool(server_url):
+    """Lazily create the shared pool of uploader processes"""
+    global _upload_pool
+    if _upload_pool is None:
+        _upload_pool = multiprocessing.Pool(
+            UPLOAD_WORKERS, initializer=_upload_worker_init, initargs=(server_url,)
+        )
+    return _upload_pool
+
+def send_photos(photo_paths, server_url=SERVER_URL):
+    """Send photos to server through a pool of uploader processes"""
+    pool = _get_upload_pool(server_url)
+    for photo_path, status_code in pool.imap_unordered(_upload_one, photo_paths):
+        if status_code == 200:
+            print(f"Uploaded {photo_path} successfully.")
+        else:
+            print(f"Failed to upload {photo_path}: {status_code}")
 
 # Convenience functions for easy testing
 def quick_stream(duration: int = 60):
@@ -575,19 +1200,37 @@ def quick_record(duration: int = 10, output_path: str = None):
     recording_id = controller.start_recording(duration, output_path)
     if recording_id:
         print(f"Recording for {duration} seconds...")
-        
-        # Monitor progress
-        start_time = time.time()
-        while time.time() - start_time < duration:
+
+        # Progress comes from a repeating timer while the main thread
+        # blocks in a single wait() instead of waking every second to poll
+        done = threading.Event()
+        last_pct = [-1]
+
+        def _emit_progress():
+            if done.is_set():
+                return
             status = controller.get_recording_status(recording_id)
-            if not status.get('is_active', False):
-                break
-            
-            progress = status.get('progress_percent', 0)
-            remaining = status.get('remaining_time', 0)
-            print(f"\rProgress: {progress:.1f}% - {remaining:.1f}s remaining", end='')
-            time.sleep(1)
-        
+            if status.get('is_active', False):
+                progress = status.get('progress_percent', 0)
+                remaining = status.get('remaining_time', 0)
+                # Unbuffered stderr, and only when the percentage actually
+                # moves - avoids a flush syscall per tick
+                if int(progress) != last_pct[0]:
+                    last_pct[0] = int(progress)
+                    sys.stderr.write(
+                        f"\rProgress: {progress:.1f}% - {remaining:.1f}s remaining")
+                    sys.stderr.flush()
+                # Adaptive cadence: sparse ticks while plenty of time
+                # remains, converging to fast ticks near the end
+                interval = max(0.05, min(1.0, remaining / 4))
+                timer = threading.Timer(interval, _emit_progress)
+                timer.daemon = True
+                timer.start()
+
+        _emit_progress()
+        controller.wait_for_recording(recording_id, timeout=duration + 5)
+        done.set()
+
         print("\nRecording completed")
         controller.cleanup_finished_recordings()
         return recording_id
@@ -689,6 +1332,7 @@ if __name__ == '__main__':
         # Stop everything
         print("Stopping all operations...")
         controller.stop_stream()
+        controller.stop_mjpeg_stream()
         
         # Stop all recordings
         recording_status = controller.get_recording_status()
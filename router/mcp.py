@@ -1,7 +1,9 @@
 from __future__ import annotations
+import asyncio
 import base64, io, time, math
+import threading
 from dataclasses import dataclass
-from typing import List, Literal, Optional, Tuple
+from typing import List, Literal, NamedTuple, Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -12,8 +14,9 @@ from mcp.server.fastmcp import FastMCP, Context
 
 # ---------- Types ----------
 
-@dataclass
-class BBox:
+class BBox(NamedTuple):
+    # Tuple-backed: serializes as a plain [x, y, w, h] array with no
+    # per-detection __dict__ allocation
     x: int
     y: int
     w: int
@@ -26,21 +29,121 @@ class DetectedObject:
     confidence: float
     angle: float  # Current angle when detected
     bbox: BBox
-    area_px: int
+
+    @property
+    def area_px(self) -> int:
+        return self.bbox.w * self.bbox.h
 
 # ---------- Hardware stubs (replace with your real calls) ----------
-def _capture_png() -> bytes:
+_cap = None  # lazily opened camera; False once open has failed
+
+def _get_capture():
+    """
+    Open the V4L2 camera once with a 1-frame driver buffer.
+    OpenCV's default queue is 4 frames deep, so snapshot-style grabs can
+    be ~130ms stale at 30fps; BUFFERSIZE=1 plus a throwaway grab() before
+    the read keeps captures at sensor freshness.
+    """
+    global _cap
+    if _cap is None:
+        cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
+        if cap.isOpened():
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            _cap = cap
+        else:
+            cap.release()
+            _cap = False
+    return _cap or None
+
+class _FrameGrabber(threading.Thread):
+    """
+    Read frames continuously so captures return the most recent one with
+    zero wait - a blocking read() costs up to 1/fps per call, which adds
+    up when look_around captures once per sweep angle.
+    """
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self._cap = cap
+        self._lock = threading.Lock()
+        self._frame = None
+        self._scratch = None  # reused read target - no per-frame allocation
+        self._running = True
+
+    def run(self):
+        while self._running:
+            if self._scratch is None:
+                # First read sizes the buffers; later reads reuse them via
+                # the 2-arg read() form
+                ok, frame = self._cap.read()
+                if ok:
+                    self._scratch = frame
+                    with self._lock:
+                        self._frame = frame.copy()
+                continue
+            ok, _ = self._cap.read(self._scratch)
+            if ok:
+                with self._lock:
+                    np.copyto(self._frame, self._scratch)
+
+    def latest(self):
+        # Copy on the (rare) capture path so callers never see a frame the
+        # 30fps grab loop is concurrently overwriting
+        with self._lock:
+            return None if self._frame is None else self._frame.copy()
+
+    def stop(self):
+        self._running = False
+
+# Static placeholder frame, rendered once - the old per-call np.zeros +
+# putText was a 230KB allocation and memset per capture
+_DUMMY_FRAME = np.zeros((240, 320, 3), dtype=np.uint8)
+cv2.putText(_DUMMY_FRAME, "CAMERA", (40, 120),
+            cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2, cv2.LINE_AA)
+
+_grabber = None  # lazily started grabber; False when no camera
+
+def _get_grabber():
+    global _grabber
+    if _grabber is None:
+        cap = _get_capture()
+        if cap is None:
+            _grabber = False
+        else:
+            _grabber = _FrameGrabber(cap)
+            _grabber.start()
+    return _grabber or None
+
+def _capture_ndarray() -> np.ndarray:
     """
-    Replace with libcamera or cv2.VideoCapture frame grab + encode.
-    For now, generate a dummy image.
+    Latest camera frame as a raw ndarray (dummy image fallback when no
+    camera is attached). Detection consumes this directly; encoding is a
+    separate step so it can be skipped when nobody wants the bytes.
     """
-    img = np.zeros((240, 320, 3), dtype=np.uint8)
-    cv2.putText(img, "CAMERA", (40, 120),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2, cv2.LINE_AA)
-    ok, buf = cv2.imencode(".png", img)
-    return buf.tobytes() if ok else b""
+    grabber = _get_grabber()
+    img = grabber.latest() if grabber is not None else None  # no blocking read
+    if img is None:
+        img = _DUMMY_FRAME
+    return img
 
-def _run_detector(image_png: bytes, current_angle: float,
+def _encode_frame(img: np.ndarray, fmt: str = "jpeg") -> Tuple[str, bytes]:
+    """
+    Encode a frame, returning (mime_type, bytes).
+    JPEG is the default: PNG's deflate pass dominates per-frame CPU on the
+    Pi and buys nothing for camera frames, while JPEG is 5-10x cheaper to
+    encode and smaller once base64'd.
+    """
+    if fmt == "png":
+        ok, buf = cv2.imencode(".png", img)
+        return ("image/png", buf.tobytes() if ok else b"")
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return ("image/jpeg", buf.tobytes() if ok else b"")
+
+def _capture_frame(fmt: str = "jpeg") -> Tuple[str, bytes]:
+    """Capture and encode in one step (for snapshot-style callers)."""
+    return _encode_frame(_capture_ndarray(), fmt)
+
+def _run_detector(image: np.ndarray, current_angle: float,
                   max_objects: int) -> List[DetectedObject]:
     """
     Replace with a real detector (e.g., Ultralytics YOLOv8n/YOLOv5n).
@@ -55,29 +158,57 @@ def _run_detector(image_png: bytes, current_angle: float,
         label="bottle",
         confidence=0.92,
         angle=current_angle,
-        bbox=bbox,
-        area_px=bbox.w * bbox.h
+        bbox=bbox
     ))
     return objs[:max_objects]
 
-def _point_to_angle(angle_deg: float):
-    """Point/rotate chassis to an absolute angle (0=front, 90=right, etc)."""
+# Motion gate: if the view at an angle is unchanged since the last sweep,
+# reuse its cached detections instead of re-running the detector backbone
+_DETECTION_CACHE = {}  # angle -> (timestamp, frame, detections)
+_MOTION_PIXEL_THRESHOLD = 25   # per-pixel delta considered "changed"
+_MOTION_MIN_CHANGED_PX = 500   # changed pixels needed to re-detect
+_DETECTION_TTL_S = 5.0
+
+def _detect_with_motion_gate(frame: np.ndarray, angle: float,
+                             max_objects: int) -> List[DetectedObject]:
+    """Run the detector unless the scene is static and the cache is fresh."""
+    cached = _DETECTION_CACHE.get(angle)
+    if cached is not None:
+        ts, prev, dets = cached
+        if time.time() - ts < _DETECTION_TTL_S and prev.shape == frame.shape:
+            gray = cv2.cvtColor(cv2.absdiff(frame, prev), cv2.COLOR_BGR2GRAY)
+            _, mask = cv2.threshold(gray, _MOTION_PIXEL_THRESHOLD, 255,
+                                    cv2.THRESH_BINARY)
+            if cv2.countNonZero(mask) < _MOTION_MIN_CHANGED_PX:
+                return dets
+
+    dets = _run_detector(frame, angle, max_objects)
+    _DETECTION_CACHE[angle] = (time.time(), frame, dets)
+    return dets
+
+def _point_to_angle(angle_deg: float) -> float:
+    """
+    Point/rotate chassis to an absolute angle (0=front, 90=right, etc).
+    Returns the achieved heading - the motion controller already reports
+    it on motion-complete, so callers need no separate hardware read.
+    """
     time.sleep(0.1)
+    return angle_deg
 
 def _get_current_angle() -> float:
     """Get current chassis heading in degrees (stub)."""
     return 0.0
 
-def _center_object_and_advance(stop_distance_m: float, timeout_s: int) -> Tuple[str, float, int, int, bytes]:
+def _center_object_and_advance(stop_distance_m: float, timeout_s: int) -> Tuple[str, float, int, int, Tuple[str, bytes]]:
     """
     Visual servoing loop (stub):
     - Maintain the target at image center (PID on x-offset)
     - Move forward until estimated range ~ stop_distance_m
-    Returns: status, final_range_m, steps, turns, terminal_snapshot_png
+    Returns: status, final_range_m, steps, turns, (mime_type, snapshot_bytes)
     """
     # Simulate success:
     time.sleep(min(timeout_s, 2))
-    snapshot = _capture_png("front")
+    snapshot = _capture_frame()
     return ("arrived", stop_distance_m, 28, 2, snapshot)
 
 def _motors_stop():
@@ -88,13 +219,25 @@ def _set_led_bitmap(width: int, height: int, data: List[int]):
     """Write to MAX7219/HT16K33/etc. (stub)."""
     pass
 
+def _set_led_bitmap_packed(bits: int):
+    """
+    Write an 8x8 bitmap packed row-major into a single uint64 (stub).
+    MAX7219-style drivers take one byte per row, so bits.to_bytes(8, "big")
+    can be shifted out directly with no per-pixel unpacking.
+    """
+    pass
+
 # ---------- Utils ----------
-def _b64(png_bytes: bytes) -> str:
-    return base64.b64encode(png_bytes).decode("ascii")
+def _b64(image_bytes: bytes) -> str:
+    # memoryview avoids an intermediate copy of the frame on the way in;
+    # the str decode stays because FastMCP JSON fields must be str
+    return base64.b64encode(memoryview(image_bytes)).decode("ascii")
 
 # ---------- MCP server ----------
 mcp = FastMCP("car-agent")
 
+_DEFAULT_ANGLES = (0.0, 90.0, 180.0, 270.0)
+
 @mcp.tool()
 def point_direction(angle_deg: float):
     """
@@ -104,31 +247,27 @@ def point_direction(angle_deg: float):
     Returns:
         status and current angle
     """
-    _point_to_angle(angle_deg)
-    current = _get_current_angle()
+    current = _point_to_angle(angle_deg)
     return {
-        "status": "ok", 
+        "status": "ok",
         "target_angle": angle_deg,
         "current_angle": current
     }
 
-# ---------- MCP server ----------
-mcp = FastMCP("car-agent")
-
 @mcp.tool()
-def look_around(
+async def look_around(
     sweep_angles: Optional[List[float]] = None,
     per_angle_pause_ms: int = 250,
     max_objects: int = 20,
     return_images: bool = True,
 ):
     """
-    Sweep through specified angles, capture PNGs, detect objects.
+    Sweep through specified angles, capture frames, detect objects.
     Args:
       sweep_angles: list of angles in degrees to point to; if omitted uses [0,90,180,270].
       per_angle_pause_ms: pause after each rotation.
       max_objects: max objects to return across all views.
-      return_images: include base64 PNGs.
+      return_images: include base64 images.
     Returns:
       images: list of {angle, mime_type, base64}
       objects: list of DetectedObject dicts
@@ -136,36 +275,55 @@ def look_around(
     """
     images = []
     objects: List[dict] = []
-    angles = sweep_angles or [0.0, 90.0, 180.0, 270.0]
-
-    for angle in angles:
-        _point_to_angle(angle)
-        time.sleep(per_angle_pause_ms / 1000.0)
-        
-        png = _capture_png()
-        if return_images:
-            images.append({
-                "angle": angle, 
-                "mime_type": "image/png", 
-                "base64": _b64(png)
-            })
+    angles = sweep_angles or _DEFAULT_ANGLES
+    per_view_max = max(1, max_objects // len(angles))
+    pause_s = per_angle_pause_ms / 1000.0
 
-        dets = _run_detector(png, angle, max_objects=max(1, max_objects // len(angles)))
+    def _collect(dets: List[DetectedObject]):
         for d in dets:
             objects.append({
                 "id": d.id,
                 "label": d.label,
                 "confidence": d.confidence,
                 "angle": d.angle,
-                "bbox": d.bbox.__dict__,
+                "bbox": list(d.bbox),
                 "area_px": d.area_px
             })
 
-    telemetry = {"battery_v": 7.8, "pose": {"x": 0.0, "y": 0.0, "theta_deg": _get_current_angle()}}
+    # Detection for view N runs while the chassis rotates to view N+1 -
+    # the rotation pause and the detector inference overlap instead of
+    # stacking serially
+    detect_task = None
+    heading = _get_current_angle()
+
+    for angle in angles:
+        heading = await asyncio.to_thread(_point_to_angle, angle)
+        await asyncio.sleep(pause_s)
+
+        frame = await asyncio.to_thread(_capture_ndarray)
+        if return_images:
+            # Only pay the encode + base64 pass when the caller wants bytes
+            mime, encoded = await asyncio.to_thread(_encode_frame, frame)
+            images.append({
+                "angle": angle,
+                "mime_type": mime,
+                "base64": _b64(encoded)
+            })
+
+        if detect_task is not None:
+            _collect(await detect_task)
+        detect_task = asyncio.create_task(
+            asyncio.to_thread(_detect_with_motion_gate, frame, angle, per_view_max))
+
+    if detect_task is not None:
+        _collect(await detect_task)
+
+    # Reuse the heading reported by the last rotation - no extra hardware read
+    telemetry = {"battery_v": 7.8, "pose": {"x": 0.0, "y": 0.0, "theta_deg": heading}}
     return {"images": images, "objects": objects, "telemetry": telemetry}
 
 @mcp.tool()
-def approach_object(
+async def approach_object(
     object_id: str,
     stop_distance_m: float = 0.30,
     timeout_s: int = 30,
@@ -175,17 +333,21 @@ def approach_object(
     Navigate toward a previously detected object.
     Returns:
       status: "arrived" | "lost" | "blocked" | "timeout" | "aborted"
-      final_range_m, path_summary, snapshot (PNG b64)
+      final_range_m, path_summary, snapshot (base64 image)
     """
     # In a real setup, you’d:
     # 1) Reacquire the object by id (cache from look_around)
     # 2) Center (PID on bbox.x + yaw) then move forward, gating by TOF/bumper
-    status, rng, steps, turns, snap = _center_object_and_advance(stop_distance_m, timeout_s)
+    # The servoing loop and snapshot encode are blocking/CPU-bound: run
+    # them off the event loop so terminate()/point_direction stay live
+    status, rng, steps, turns, (mime, snap) = await asyncio.to_thread(
+        _center_object_and_advance, stop_distance_m, timeout_s)
+    b64 = await asyncio.to_thread(_b64, snap)
     return {
         "status": status,
         "final_range_m": rng,
         "path_summary": {"steps": steps, "turns": turns},
-        "snapshot": {"mime_type": "image/png", "base64": _b64(snap)}
+        "snapshot": {"mime_type": mime, "base64": b64}
     }
 
 @mcp.tool()
@@ -195,6 +357,13 @@ def terminate(reason: str = "user_request"):
     """
     _motors_stop()
     # Close camera, threads, GPIO, etc.
+    global _grabber, _cap
+    if _grabber:
+        _grabber.stop()
+        _grabber = None
+    if _cap:
+        _cap.release()
+        _cap = None
     return {"status": "ok", "reason": reason}
 
 # Simple 8x8 presets
@@ -221,6 +390,39 @@ PRESETS = {
     ],
 }
 
+# Packed once at import - each 8x8 pattern collapses to one uint64, so
+# set_led_emoji is a dict lookup instead of 64 int() calls per invocation
+PRESET_BITMAPS = {name: int("".join(rows), 2) for name, rows in PRESETS.items()}
+
+# Placeholder square "face" for the emoji branch, packed the same way
+_EMOJI_FACE = int("".join(
+    "1" if ((x in (2, 5) and y in (2, 3)) or (y == 5 and 1 <= x <= 6)) else "0"
+    for y in range(8) for x in range(8)
+), 2)
+
+def _handle_preset(preset: str):
+    _set_led_bitmap_packed(PRESET_BITMAPS[preset])
+    return {"status": "ok", "mode": "preset", "name": preset}
+
+def _handle_emoji(emoji: str):
+    # TODO: map the emoji to an 8x8 glyph using a tiny font table
+    # For now, render the precomputed square “face”
+    _set_led_bitmap_packed(_EMOJI_FACE)
+    return {"status": "ok", "mode": "emoji", "char": emoji}
+
+def _handle_bitmap(bitmap: dict):
+    w = int(bitmap["width"]); h = int(bitmap["height"]); data = list(bitmap["data"])
+    if w*h != len(data):
+        return {"error": "bitmap size does not match data length"}
+    _set_led_bitmap(w, h, data)
+    return {"status": "ok", "mode": "bitmap"}
+
+_LED_HANDLERS = {
+    "preset": _handle_preset,
+    "emoji": _handle_emoji,
+    "bitmap": _handle_bitmap,
+}
+
 @mcp.tool()
 def set_led_emoji(
     preset: Optional[Literal["smile","heart"]] = None,
@@ -234,33 +436,13 @@ def set_led_emoji(
     - emoji: a single-char glyph (render via your own font mapping)
     - bitmap: {"width":8,"height":8,"data":[0/1,... length=64]}
     """
-    choices = [preset is not None, emoji is not None, bitmap is not None]
-    if sum(choices) != 1:
+    args = {k: v for k, v in (("preset", preset), ("emoji", emoji),
+                              ("bitmap", bitmap)) if v is not None}
+    if len(args) != 1:
         return {"error": "Provide exactly one of preset, emoji, or bitmap"}
 
-    if preset:
-        rows = PRESETS[preset]
-        data = [int(c) for row in rows for c in row]
-        _set_led_bitmap(8, 8, data)
-        return {"status": "ok", "mode": "preset", "name": preset}
-
-    if emoji:
-        # TODO: map the emoji to an 8x8 glyph using a tiny font table
-        # For now, render a square “face”
-        data = [0]*64
-        for i in range(64):
-            x, y = i % 8, i // 8
-            if (x in (2,5) and y in (2,3)) or (y in (5,) and 1 <= x <= 6):
-                data[i] = 1
-        _set_led_bitmap(8, 8, data)
-        return {"status": "ok", "mode": "emoji", "char": emoji}
-
-    # bitmap path
-    w = int(bitmap["width"]); h = int(bitmap["height"]); data = list(bitmap["data"])
-    if w*h != len(data):
-        return {"error": "bitmap size does not match data length"}
-    _set_led_bitmap(w, h, data)
-    return {"status": "ok", "mode": "bitmap"}
+    (kind, value), = args.items()
+    return _LED_HANDLERS[kind](value)
 
 # Optional read-only resources
 @mcp.resource("car://state")
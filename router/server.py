@@ -3,15 +3,23 @@ FastAPI server that wraps the CameraController functionality.
 Provides REST API endpoints for camera operations including streaming, recording, and frame capture.
 """
 
+import asyncio
+import hmac
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field
+import orjson
 from dotenv import load_dotenv
 
 # Import our camera controller
@@ -32,16 +40,24 @@ HLS_OUTPUT_DIR = "./hls_out"
 app = FastAPI(
     title="Camera Control API",
     description="REST API for camera streaming, recording, and frame capture",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes the small status/health payloads roughly 2x
+    # faster than the stdlib json path
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Configure CORS.  The origin list is deduped up front (FRONTEND_ORIGIN
+# defaults to localhost:3000, which would otherwise appear twice in the
+# per-request scan), and max_age lets browsers cache preflights for a
+# day instead of re-asking before every call.
+_CORS_ORIGINS = tuple(dict.fromkeys([FRONTEND_ORIGIN, "http://localhost:3000"]))
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[FRONTEND_ORIGIN, "http://localhost:3000"],
+    allow_origins=list(_CORS_ORIGINS),
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["Authorization", "x-api-key", "Content-Type"],
+    max_age=86400,
 )
 
 # Create HLS output directory if it doesn't exist
@@ -50,23 +66,96 @@ Path(HLS_OUTPUT_DIR).mkdir(exist_ok=True)
 # Global camera controller instance
 camera_controller = CameraController()
 
-# Pydantic models for request/response
+# Camera pipeline: device-touching operations go through an asyncio.Queue
+# drained by a single worker task onto a one-thread executor, so the
+# hardware sees strictly serial access while the event loop stays free
+# and bursts queue up instead of piling threads onto the device.  File
+# I/O like take_photos runs on a separate executor and can overlap.
+_camera_queues: Dict[asyncio.AbstractEventLoop, asyncio.Queue] = {}
+_camera_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="camera-io")
+
+async def _camera_worker(queue: asyncio.Queue):
+    """Drain the camera queue, running one device operation at a time"""
+    loop = asyncio.get_running_loop()
+    while True:
+        func, kwargs, future = await queue.get()
+        try:
+            result = await loop.run_in_executor(_camera_executor, partial(func, **kwargs))
+        except Exception as exc:
+            if not future.cancelled():
+                future.set_exception(exc)
+        else:
+            if not future.cancelled():
+                future.set_result(result)
+        finally:
+            queue.task_done()
+
+async def _camera_call(func, **kwargs):
+    """Queue a camera operation and await its result.
+
+    The queue and its worker task are created lazily per event loop
+    (uvicorn has one; TestClient may use one per request), and serial
+    device access is enforced by the shared one-thread executor.
+    """
+    loop = asyncio.get_running_loop()
+    queue = _camera_queues.get(loop)
+    if queue is None:
+        queue = _camera_queues[loop] = asyncio.Queue()
+        loop.create_task(_camera_worker(queue))
+    future = loop.create_future()
+    await queue.put((func, kwargs, future))
+    return await future
+
+async def _io_call(func, **kwargs):
+    """Run a non-device operation (file I/O, status reads) off-loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, partial(func, **kwargs))
+
+async def _await_with_disconnect(http_request: Request, task, cancel_event: threading.Event):
+    """Await a camera task, signalling cancellation if the client leaves.
+
+    The worker thread can't be interrupted mid-capture, so cancellation
+    is cooperative: the event makes the operation stop at its next
+    checkpoint and return what it has so far.
+    """
+    while not task.done():
+        await asyncio.sleep(0.1)
+        if await http_request.is_disconnected():
+            cancel_event.set()
+            break
+    return await task
+
+# Pydantic models for request/response.  extra='forbid' and frozen=True
+# let pydantic-core compile a stricter, immutable validator once at
+# import and reuse it unchanged for every request.
 class ScanSurroundingsRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True, validate_default=False)
+
     count: int = Field(default=5, ge=1, le=20, description="Number of photos to take")
 
 class StreamStartRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True, validate_default=False,
+                              populate_by_name=True)
+
     width: int = Field(default=640, ge=320, le=1920)
     height: int = Field(default=480, ge=240, le=1080)
     framerate: int = Field(default=15, ge=5, le=60)
     bitrate: int = Field(default=2000000, ge=500000, le=10000000)
-    segment_duration: float = Field(default=0.5, ge=0.1, le=5.0, alias="segmentDuration")
+    segment_duration: float = Field(default=0.2, ge=0.1, le=5.0, alias="segmentDuration")
     playlist_size: int = Field(default=6, ge=3, le=20, alias="playlistSize")
 
 class CaptureRequest(BaseModel):
-    width: Optional[int] = Field(default=640, ge=320, le=1920)
-    height: Optional[int] = Field(default=480, ge=240, le=1080)
+    model_config = ConfigDict(extra='forbid', frozen=True, validate_default=False)
+
+    # Plain int with a default: an Optional here would add a union
+    # validator per field for no benefit
+    width: int = Field(default=640, ge=320, le=1920)
+    height: int = Field(default=480, ge=240, le=1080)
 
 class RecordStartRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True, validate_default=False)
+
     duration: int = Field(ge=1, le=3600, description="Recording duration in seconds")
     width: int = Field(default=640, ge=320, le=1920)
     height: int = Field(default=480, ge=240, le=1080)
@@ -74,286 +163,387 @@ class RecordStartRequest(BaseModel):
     bitrate: int = Field(default=2000000, ge=500000, le=10000000)
 
 class RecordStopRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid', frozen=True, validate_default=False)
+
     recording_id: str = Field(description="ID of the recording to stop")
 
 class ApiResponse(BaseModel):
+    """Response shape returned by the API.
+
+    Handlers return plain dicts matching this schema rather than model
+    instances - FastAPI would otherwise re-validate every response
+    against the annotation, which for a Dict[str, Any] payload is pure
+    overhead on the serialization path.
+    """
     success: bool
     data: Optional[Dict[str, Any]] = None
     message: Optional[str] = None
 
-# Authentication dependency
+# Authentication dependency. Fail closed on misconfiguration: with
+# BACKEND_API_KEY set to an empty string (e.g. "BACKEND_API_KEY=" in
+# .env), comparing against b"" would silently accept every request
+# that sends no header at all.
+if not BACKEND_API_KEY:
+    raise RuntimeError(
+        "BACKEND_API_KEY is configured but empty - refusing to start with authentication disabled"
+    )
+_EXPECTED_KEY = BACKEND_API_KEY.encode()
+
 async def verify_api_key(request: Request):
-    """Verify the x-api-key header"""
-    api_key = request.headers.get("x-api-key")
-    if not api_key or api_key != BACKEND_API_KEY:
+    """Verify the x-api-key header (constant-time compare).
+
+    async on purpose: a plain def dependency would be dispatched to
+    the threadpool per request, and compare_digest doesn't block.
+    """
+    api_key = request.headers.get("x-api-key", "")
+    if not api_key or not hmac.compare_digest(api_key.encode(), _EXPECTED_KEY):
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
     return True
 
-# Exception handler
+# Exception handlers.  Handlers below contain no per-endpoint
+# try/except: unexpected errors propagate here (CancelledError is a
+# BaseException and passes straight through, preserving disconnect
+# semantics), and intentional HTTPExceptions keep their status codes.
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request: Request, exc: HTTPException):
+    """Serialize intentional HTTP errors with orjson"""
+    return ORJSONResponse(status_code=exc.status_code,
+                          content={"detail": exc.detail},
+                          headers=exc.headers)
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    """Handle general exceptions"""
-    return JSONResponse(
+    """Handle unexpected exceptions"""
+    return ORJSONResponse(
         status_code=500,
-        content={"success": False, "message": f"Internal server error: {str(exc)}"}
+        content={"success": False, "detail": f"Internal server error: {str(exc)}"}
     )
 
+@app.on_event("startup")
+async def expand_worker_threadpool():
+    """Widen the default 40-slot threadpool so slow camera calls can't
+    exhaust it and starve health checks and status polls"""
+    from anyio.to_thread import current_default_thread_limiter
+    current_default_thread_limiter().total_tokens = 200
+
+# Background cleanup: finished recordings are reaped periodically off
+# the request path, and /cleanup just reports the running totals
+_cleanup_stats = {"cleaned_total": 0, "last_cleaned": 0, "runs": 0}
+
+async def _cleanup_loop(interval_s: float = 30.0):
+    """Periodically reap finished recordings off the request path"""
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            cleaned = await _io_call(camera_controller.cleanup_finished_recordings)
+        except Exception as e:
+            print(f"Background cleanup failed: {e}")
+            continue
+        _cleanup_stats["last_cleaned"] = cleaned
+        _cleanup_stats["cleaned_total"] += cleaned
+        _cleanup_stats["runs"] += 1
+
+@app.on_event("startup")
+async def start_cleanup_task():
+    """Kick off the periodic recording-cleanup task"""
+    asyncio.create_task(_cleanup_loop())
+
+# Constant GET responses are serialized once at import; the handlers
+# just hand back the cached bytes instead of re-encoding per request
+_HEALTH_BYTES = orjson.dumps(
+    {"ok": True, "status": "healthy", "service": "camera-control-api"})
+
 # Health check endpoint (no auth required)
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"ok": True, "status": "healthy", "service": "camera-control-api"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 # Camera endpoints (all require authentication)
 @app.post("/scan-surroundings", dependencies=[Depends(verify_api_key)])
-async def scan_surroundings(request: ScanSurroundingsRequest) -> ApiResponse:
+async def scan_surroundings(request: ScanSurroundingsRequest, http_request: Request):
     """
     Scan surroundings by taking multiple photos
     Returns list of file paths where photos were saved
     """
-    try:
-        # Use the legacy take_photos function which now uses remote camera
-        photo_paths = take_photos(count=request.count, save_dir="/tmp/scan_photos")
-        
-        return ApiResponse(
-            success=True,
-            data={
-                "photo_paths": photo_paths,
-                "count": len(photo_paths)
-            },
-            message=f"Successfully captured {len(photo_paths)} photos"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to scan surroundings: {str(e)}")
+    # Use the legacy take_photos function which now uses remote camera.
+    # A disconnect mid-scan stops the remaining captures promptly
+    # instead of holding the camera for up to 20 more photos.
+    cancel_event = threading.Event()
+    task = asyncio.create_task(_io_call(
+        take_photos, count=request.count, save_dir="/tmp/scan_photos",
+        cancel_event=cancel_event))
+    photo_paths = await _await_with_disconnect(http_request, task, cancel_event)
+
+    return {
+        "success": True,
+        "data": {
+            "photo_paths": photo_paths,
+            "count": len(photo_paths)
+        },
+        "message": f"Successfully captured {len(photo_paths)} photos"
+    }
 
 @app.post("/stream/start", dependencies=[Depends(verify_api_key)])
-async def start_stream(request: StreamStartRequest) -> ApiResponse:
+async def start_stream(request: StreamStartRequest):
     """Start video streaming with specified parameters"""
-    try:
-        success = camera_controller.start_stream(
-            width=request.width,
-            height=request.height,
-            framerate=request.framerate,
-            bitrate=request.bitrate,
-            segment_duration=request.segment_duration,
-            playlist_size=request.playlist_size
-        )
-        
-        if success:
-            status = camera_controller.get_stream_status()
-            return ApiResponse(
-                success=True,
-                data=status,
-                message="Stream started successfully"
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to start stream")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting stream: {str(e)}")
+    success = await _camera_call(
+        camera_controller.start_stream,
+        width=request.width,
+        height=request.height,
+        framerate=request.framerate,
+        bitrate=request.bitrate,
+        segment_duration=request.segment_duration,
+        playlist_size=request.playlist_size
+    )
+
+    if success:
+        status = camera_controller.get_stream_status()
+        return {
+            "success": True,
+            "data": status,
+            "message": "Stream started successfully"
+        }
+    else:
+        raise HTTPException(status_code=500, detail="Failed to start stream")
 
 @app.post("/stream/stop", dependencies=[Depends(verify_api_key)])
-async def stop_stream() -> ApiResponse:
+async def stop_stream():
     """Stop the current video stream"""
-    try:
-        success = camera_controller.stop_stream()
-        
-        return ApiResponse(
-            success=success,
-            message="Stream stopped successfully" if success else "Failed to stop stream"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error stopping stream: {str(e)}")
+    success = await _camera_call(camera_controller.stop_stream)
+
+    return {
+        "success": success,
+        "message": "Stream stopped successfully" if success else "Failed to stop stream"
+    }
 
 @app.get("/stream/status", dependencies=[Depends(verify_api_key)])
-async def get_stream_status() -> ApiResponse:
+async def get_stream_status():
     """Get current stream status"""
-    try:
-        status = camera_controller.get_stream_status()
-        return ApiResponse(
-            success=True,
-            data=status
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting stream status: {str(e)}")
+    status = await _io_call(camera_controller.get_stream_status)
+    return {"success": True, "data": status}
 
 @app.post("/capture", dependencies=[Depends(verify_api_key)])
-async def capture_frame(request: CaptureRequest) -> ApiResponse:
+async def capture_frame(request: CaptureRequest):
     """Capture a single frame from the camera"""
-    try:
-        frame_path = camera_controller.capture_frame(
-            width=request.width,
-            height=request.height
-        )
-        
-        if frame_path:
-            return ApiResponse(
-                success=True,
-                data={
-                    "frame_path": frame_path,
-                    "width": request.width,
-                    "height": request.height
-                },
-                message="Frame captured successfully"
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to capture frame")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error capturing frame: {str(e)}")
+    frame_path = await _camera_call(
+        camera_controller.capture_frame,
+        width=request.width,
+        height=request.height
+    )
+
+    if frame_path:
+        return {
+            "success": True,
+            "data": {
+                "frame_path": frame_path,
+                "width": request.width,
+                "height": request.height
+            },
+            "message": "Frame captured successfully"
+        }
+    else:
+        raise HTTPException(status_code=500, detail="Failed to capture frame")
 
 @app.post("/record/start", dependencies=[Depends(verify_api_key)])
-async def start_recording(request: RecordStartRequest) -> ApiResponse:
+async def start_recording(request: RecordStartRequest, http_request: Request):
     """Start video recording with specified parameters"""
-    try:
-        recording_id = camera_controller.start_recording(
-            duration=request.duration,
-            width=request.width,
-            height=request.height,
-            framerate=request.framerate,
-            bitrate=request.bitrate
-        )
-        
-        if recording_id:
-            # Get initial recording status
-            status = camera_controller.get_recording_status(recording_id)
-            
-            return ApiResponse(
-                success=True,
-                data={
-                    "recording_id": recording_id,
-                    "status": status
-                },
-                message="Recording started successfully"
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to start recording")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting recording: {str(e)}")
+    recording_id = await _camera_call(
+        camera_controller.start_recording,
+        duration=request.duration,
+        width=request.width,
+        height=request.height,
+        framerate=request.framerate,
+        bitrate=request.bitrate
+    )
+
+    if recording_id and await http_request.is_disconnected():
+        # Client left before we could answer - don't leave an
+        # orphaned recording running for up to an hour
+        await _camera_call(camera_controller.stop_recording,
+                           recording_id=recording_id)
+        recording_id = None
+
+    if recording_id:
+        # Get initial recording status
+        status = camera_controller.get_recording_status(recording_id)
+
+        return {
+            "success": True,
+            "data": {
+                "recording_id": recording_id,
+                "status": status
+            },
+            "message": "Recording started successfully"
+        }
+    else:
+        raise HTTPException(status_code=500, detail="Failed to start recording")
 
 @app.post("/record/stop", dependencies=[Depends(verify_api_key)])
-async def stop_recording(request: RecordStopRequest) -> ApiResponse:
+async def stop_recording(request: RecordStopRequest):
     """Stop a specific recording"""
-    try:
-        success = camera_controller.stop_recording(request.recording_id)
-        
-        if success:
-            return ApiResponse(
-                success=True,
-                data={"recording_id": request.recording_id},
-                message="Recording stopped successfully"
-            )
-        else:
-            raise HTTPException(status_code=404, detail="Recording not found or already stopped")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error stopping recording: {str(e)}")
+    success = await _camera_call(
+        camera_controller.stop_recording, recording_id=request.recording_id)
+
+    if success:
+        return {
+            "success": True,
+            "data": {"recording_id": request.recording_id},
+            "message": "Recording stopped successfully"
+        }
+    else:
+        raise HTTPException(status_code=404, detail="Recording not found or already stopped")
 
 @app.get("/record/status", dependencies=[Depends(verify_api_key)])
-async def get_recording_status(recording_id: Optional[str] = None) -> ApiResponse:
+async def get_recording_status(recording_id: Optional[str] = None):
     """Get status of recordings (all recordings if recording_id not specified)"""
-    try:
-        status = camera_controller.get_recording_status(recording_id)
-        
-        return ApiResponse(
-            success=True,
-            data=status
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting recording status: {str(e)}")
+    status = await _io_call(
+        camera_controller.get_recording_status, recording_id=recording_id)
+
+    return {"success": True, "data": status}
 
 @app.post("/camera/test", dependencies=[Depends(verify_api_key)])
-async def test_camera() -> ApiResponse:
+async def test_camera():
     """Test camera connection and capabilities"""
-    try:
-        connection_ok = camera_controller.test_camera_connection()
-        camera_info = camera_controller.get_camera_info()
-        
-        return ApiResponse(
-            success=connection_ok,
-            data={
-                "connection": connection_ok,
-                "camera_info": camera_info
-            },
-            message="Camera test completed"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error testing camera: {str(e)}")
+    connection_ok = await _camera_call(camera_controller.test_camera_connection)
+    camera_info = await _camera_call(camera_controller.get_camera_info)
+
+    return {
+        "success": connection_ok,
+        "data": {
+            "connection": connection_ok,
+            "camera_info": camera_info
+        },
+        "message": "Camera test completed"
+    }
 
 @app.post("/cleanup", dependencies=[Depends(verify_api_key)])
-async def cleanup_resources() -> ApiResponse:
-    """Cleanup finished recordings and temporary files"""
-    try:
-        cleaned_count = camera_controller.cleanup_finished_recordings()
-        
-        return ApiResponse(
-            success=True,
-            data={"cleaned_recordings": cleaned_count},
-            message=f"Cleaned up {cleaned_count} finished recordings"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error during cleanup: {str(e)}")
-
-# HLS stream endpoints (no auth required for video playback)
-@app.get("/stream.m3u8")
-async def get_hls_playlist():
-    """Get HLS playlist file"""
-    playlist_path = Path(HLS_OUTPUT_DIR) / "stream.m3u8"
-    if playlist_path.exists():
-        return FileResponse(playlist_path, media_type="application/vnd.apple.mpegurl")
-    else:
-        raise HTTPException(status_code=404, detail="Stream not found")
-
-@app.get("/stream_{segment:path}.ts")
-async def get_hls_segment(segment: str):
-    """Get HLS video segment"""
-    segment_path = Path(HLS_OUTPUT_DIR) / f"stream_{segment}.ts"
-    if segment_path.exists():
-        return FileResponse(segment_path, media_type="video/mp2t")
-    else:
-        raise HTTPException(status_code=404, detail="Segment not found")
+async def cleanup_resources():
+    """Report cleanup stats; the actual reaping runs in the background"""
+    return {
+        "success": True,
+        "data": {
+            "cleaned_recordings": _cleanup_stats["last_cleaned"],
+            "cleaned_total": _cleanup_stats["cleaned_total"],
+            "cleanup_runs": _cleanup_stats["runs"]
+        },
+        "message": f"Cleaned up {_cleanup_stats['cleaned_total']} finished recordings so far"
+    }
+
+_API_INFO_BYTES = orjson.dumps({
+    "service": "Camera Control API",
+    "version": "1.0.0",
+    "endpoints": {
+        "health": "GET /health",
+        "scan": "POST /scan-surroundings",
+        "stream": {
+            "start": "POST /stream/start",
+            "stop": "POST /stream/stop",
+            "status": "GET /stream/status"
+        },
+        "capture": "POST /capture",
+        "record": {
+            "start": "POST /record/start",
+            "stop": "POST /record/stop",
+            "status": "GET /record/status"
+        },
+        "camera": "POST /camera/test",
+        "cleanup": "POST /cleanup"
+    },
+    "hls_stream": "/stream.m3u8",
+    "auth": "x-api-key header required"
+})
 
 # Root endpoint redirect to health
 @app.get("/api")
 async def api_info():
     """API information endpoint"""
-    return {
-        "service": "Camera Control API",
-        "version": "1.0.0",
-        "endpoints": {
-            "health": "GET /health",
-            "scan": "POST /scan-surroundings",
-            "stream": {
-                "start": "POST /stream/start",
-                "stop": "POST /stream/stop", 
-                "status": "GET /stream/status"
-            },
-            "capture": "POST /capture",
-            "record": {
-                "start": "POST /record/start",
-                "stop": "POST /record/stop",
-                "status": "GET /record/status"
-            },
-            "camera": "POST /camera/test",
-            "cleanup": "POST /cleanup"
-        },
-        "hls_stream": "/stream.m3u8",
-        "auth": "x-api-key header required"
-    }
+    return Response(content=_API_INFO_BYTES, media_type="application/json")
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with HLS-appropriate caching: segments are immutable
+    (unique filenames), playlists and init segments must stay fresh.
+
+    Segment stat results are memoized briefly so repeat GETs of the
+    same segment (N players polling a short-segment stream) skip the
+    stat syscall - Starlette reuses the cached os.stat_result when
+    building the FileResponse. Entries expire after a short TTL: the
+    HLS directory is live, so a stream restart can rewrite a segment
+    name and ffmpeg's delete_segments removes old ones, and a stale
+    stat_result would send the wrong Content-Length or make
+    FileResponse blow up mid-send on a vanished file. Playlists bypass
+    the cache since they change every segment interval.
+    """
 
-# Mount static files for HLS streaming AFTER all API routes
-app.mount("/hls", StaticFiles(directory=HLS_OUTPUT_DIR), name="hls")
+    _MAX_STAT_CACHE = 1024
+    _STAT_TTL = 1.0  # seconds; one stat per segment per TTL window
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stat_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Starlette calls lookup_path from threadpool workers, so
+        # concurrent segment GETs hit the cache from parallel threads
+        self._stat_lock = threading.Lock()
+
+    def lookup_path(self, path):
+        if path.endswith((".ts", ".m4s")):
+            now = time.monotonic()
+            with self._stat_lock:
+                cached = self._stat_cache.get(path)
+                if cached is not None:
+                    expires_at, full_path, stat_result = cached
+                    if now < expires_at:
+                        self._stat_cache.move_to_end(path)
+                        return full_path, stat_result
+                    self._stat_cache.pop(path, None)
+            full_path, stat_result = super().lookup_path(path)
+            if stat_result is not None:
+                with self._stat_lock:
+                    self._stat_cache[path] = (now + self._STAT_TTL, full_path, stat_result)
+                    if len(self._stat_cache) > self._MAX_STAT_CACHE:
+                        self._stat_cache.popitem(last=False)
+            return full_path, stat_result
+        return super().lookup_path(path)
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        if str(getattr(response, "path", "")).endswith((".ts", ".m4s")):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+# Mount static files for HLS streaming AFTER all API routes.  The root
+# mount serves /stream.m3u8, /stream_*.ts|.m4s and /init.mp4 through
+# Starlette's static dispatcher (one path join + sendfile) instead of
+# per-segment routing regexes and Python handlers; API routes above
+# still take precedence.
+app.mount("/hls", CachedStaticFiles(directory=HLS_OUTPUT_DIR), name="hls")
+app.mount("/", CachedStaticFiles(directory=HLS_OUTPUT_DIR, check_dir=False), name="hls-root")
 
 if __name__ == "__main__":
     import uvicorn
     
     # Get port from environment or default to 5055
     port = int(os.getenv("PORT", 5055))
-    
-    uvicorn.run(
-        "server:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True
-    )
\ No newline at end of file
+
+    if os.getenv("DEV"):
+        # Dev mode: autoreload watcher, single worker
+        uvicorn.run("server:app", host="0.0.0.0", port=port, reload=True)
+    else:
+        # Production: C event loop + C HTTP parser on the ASGI hot
+        # path. Workers default to 1 because the stream/recording
+        # registry and camera pipeline live in process-global state -
+        # with N workers a recording started on one process 404s on
+        # another, and two /stream/start calls can race competing
+        # ffmpeg pipelines onto the same hls_out. Raise WORKERS only
+        # once that registry lives outside process memory.
+        uvicorn.run(
+            "server:app",
+            host="0.0.0.0",
+            port=port,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WORKERS", 1)),
+            log_level="warning",
+        )
\ No newline at end of file
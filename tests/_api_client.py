@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client plumbing for the API test suites.
+
+Both test_camera_api.py and run_tests.py used to build their own
+requests.Session with the same adapter tuning; importing it from here
+means one import graph warmup and one connection pool per process
+(per xdist worker, Python's import cache amortizes the rest).
+"""
+
+import requests
+
+API_KEY = "dev-secret"
+HEADERS = {
+    "x-api-key": API_KEY,
+    "Content-Type": "application/json"
+}
+
+# Tight (connect, read) timeouts bound the worst case: a hung server
+# costs seconds, not 30s multiplied across the suite
+DEFAULT_TIMEOUT = (1.0, 5.0)
+
+
+def session_with(headers, pool_connections=4, pool_maxsize=16):
+    """Build a keep-alive session preloaded with fixed headers.
+
+    trust_env=False skips proxy/.netrc env parsing on every request;
+    retries stay off so failures surface immediately.
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    session.trust_env = False
+    session.mount("http://", requests.adapters.HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+        pool_block=False,
+        max_retries=requests.adapters.Retry(total=0, connect=1,
+                                            backoff_factor=0.1)))
+    return session
+
+
+# One authenticated session shared by every importer; a Session is
+# host-agnostic, so runners targeting different ports can still share
+# its pool
+SESSION = session_with(HEADERS)
+
+
+def make(method, url, data=None, headers=None, timeout=DEFAULT_TIMEOUT):
+    """Issue a request on the shared session (data is pre-encoded bytes)"""
+    return SESSION.request(method, url, data=data, headers=headers,
+                           timeout=timeout)
@@ -3,10 +3,11 @@
 pytest configuration and fixtures for the test suite.
 """
 
+import atexit
 import pytest
 import os
 import sys
-import requests
+import httpx
 from unittest.mock import Mock, patch
 
 # Add project root to path
@@ -15,13 +16,51 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from camera.control import CameraController
 
 # Test configuration
-API_BASE = "http://localhost:5056"  # Updated to test server port
+API_BASE = "http://127.0.0.1:5056"  # Literal IP skips getaddrinfo per connection
 CAMERA_AVAILABLE = None  # Will be determined at runtime
 
+# One keep-alive client for every readiness probe in the session -
+# per-test requests.get calls would open a fresh TCP connection for
+# each server_required skip check
+_PROBE = httpx.Client(base_url=API_BASE, timeout=2.0, trust_env=False,
+                      transport=httpx.HTTPTransport(retries=0))
+atexit.register(_PROBE.close)
+
+# Memoized server probe: one /health round trip per session instead of
+# one per server-dependent test
+_SERVER_UP = None
+
+def _server_up() -> bool:
+    global _SERVER_UP
+    if _SERVER_UP is None:
+        try:
+            _SERVER_UP = _PROBE.get("/health").status_code == 200
+        except httpx.HTTPError:
+            _SERVER_UP = False
+    return _SERVER_UP
+
+@pytest.fixture(scope="session")
+def api_session():
+    """Shared probe client for tests that need the live server.
+
+    Skips the requesting test immediately when no server is running,
+    instead of letting each request time out on its own.
+    """
+    if not _server_up():
+        pytest.skip(f"Server not running at {API_BASE}")
+    yield _PROBE
+
 def pytest_configure(config):
-    """Configure pytest with custom markers."""
+    """Configure pytest with custom markers.
+
+    Registered here rather than in pyproject.toml because the repo's
+    pytest.ini is the config file pytest actually selects, shadowing
+    the [tool.pytest.ini_options] marker list.
+    """
     config.addinivalue_line("markers", "camera_hardware: mark test as requiring camera hardware")
     config.addinivalue_line("markers", "server_required: mark test as requiring running server")
+    config.addinivalue_line("markers", "integration: mark test as requiring the live API server")
+    config.addinivalue_line("markers", "xdist_group(name): group tests onto one pytest-xdist worker")
 
 @pytest.fixture(scope="session")
 def camera_available():
@@ -35,56 +74,102 @@ def camera_available():
             CAMERA_AVAILABLE = False
     return CAMERA_AVAILABLE
 
-@pytest.fixture(scope="session") 
+@pytest.fixture(autouse=True)
+def fast_sleep(request, monkeypatch):
+    """Accelerate the clock for camera-control tests in mock mode.
+
+    The streaming/recording tests contain multi-second sleeps and
+    deadline loops sized for real hardware. In mock mode time.sleep
+    becomes a no-op that advances a fake offset reflected by both
+    time.time() and time.monotonic(), so those waits finish in
+    microseconds while deadlines still trip in order (patching only
+    time() would leave monotonic-deadline loops busy-spinning for
+    their full real duration). Scoped to the camera-control module so
+    in-process API tests neither trigger the SSH hardware probe nor
+    run under a fake clock; hardware runs keep the real clock.
+    """
+    if not request.module.__name__.endswith("test_camera_control"):
+        yield
+        return
+    if request.getfixturevalue("camera_available"):
+        yield
+        return
+
+    import time as _time
+
+    real_time = _time.time
+    real_monotonic = _time.monotonic
+    offset = [0.0]
+
+    def _sleep(seconds):
+        offset[0] += seconds
+
+    monkeypatch.setattr(_time, "sleep", _sleep)
+    monkeypatch.setattr(_time, "time", lambda: real_time() + offset[0])
+    monkeypatch.setattr(_time, "monotonic", lambda: real_monotonic() + offset[0])
+    yield
+
+@pytest.fixture(scope="session")
 def server_running():
     """Check if the API server is running."""
-    try:
-        response = requests.get(f"{API_BASE}/health", timeout=2)
-        return response.status_code == 200
-    except:
-        return False
+    return _server_up()
+
+def _wait_for_server(deadline_s=15.0):
+    """Probe /health with exponential backoff until ready or deadline.
+
+    Starts at 50ms so a server that's up in half a second is detected
+    in half a second, instead of the old fixed 1s polling cadence.
+    """
+    import time
+
+    delay = 0.05
+    deadline = time.time() + deadline_s
+    while time.time() < deadline:
+        try:
+            if _PROBE.get("/health", timeout=0.5).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+    return False
 
 @pytest.fixture(scope="session")
 def test_server():
     """Start a test server if one isn't already running."""
-    import threading
     import subprocess
-    import time
-    
+
     # Check if server is already running
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=2)
-        if response.status_code == 200:
+        if _PROBE.get("/health").status_code == 200:
             print("✓ Server already running")
             yield True
             return
-    except:
+    except httpx.HTTPError:
         pass
-    
+
     print("🚀 Starting test server...")
-    
+
     # Start server in background
     server_process = None
     try:
-        # Set environment variable for testing
-        env = os.environ.copy()
+        # Pass only the env the server needs instead of copying the
+        # parent's full environment for every spawn
+        env = {key: os.environ[key]
+               for key in ('PATH', 'HOME', 'LANG', 'PYTHONPATH')
+               if key in os.environ}
         env['BACKEND_API_KEY'] = 'dev-secret'
-        
+        env['PORT'] = '5055'
+
         server_process = subprocess.Popen([
             sys.executable, '-m', 'uvicorn', 'router.server:app',
             '--host', '0.0.0.0', '--port', '5055'
         ], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
+
         # Wait for server to start
-        for i in range(30):  # Wait up to 30 seconds
-            try:
-                response = requests.get(f"{API_BASE}/health", timeout=1)
-                if response.status_code == 200:
-                    print("✓ Test server started")
-                    yield True
-                    break
-            except:
-                time.sleep(1)
+        if _wait_for_server():
+            print("✓ Test server started")
+            yield True
         else:
             print("✗ Failed to start test server")
             yield False
@@ -152,12 +237,7 @@ def pytest_runtest_setup(item):
         except Exception:
             pytest.skip("Camera hardware not available")
     
-    # Skip server tests if server not running
-    server_required_marker = item.get_closest_marker("server_required")
-    if server_required_marker:
-        try:
-            response = requests.get(f"{API_BASE}/health", timeout=2)
-            if response.status_code != 200:
-                pytest.skip(f"Server not running at {API_BASE}")
-        except:
-            pytest.skip(f"Server not running at {API_BASE}")
\ No newline at end of file
+    # Skip server tests if server not running (probed once per session)
+    if item.get_closest_marker("server_required") or item.get_closest_marker("integration"):
+        if not _server_up():
+            pytest.skip(f"Server not running at {API_BASE}")
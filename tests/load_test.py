@@ -6,20 +6,42 @@ Tests concurrent requests and API performance.
 
 import asyncio
 import aiohttp
+import numpy as np
+import orjson
 import time
 import statistics
+from contextlib import asynccontextmanager
 from typing import List, Dict
-import json
 import pytest
 
 # Configuration
-API_BASE = "http://localhost:5056"  # Updated to test server port
+API_BASE = "http://127.0.0.1:5056"  # Literal IP skips getaddrinfo per connection
 API_KEY = "dev-secret"
 HEADERS = {
     "x-api-key": API_KEY,
     "Content-Type": "application/json"
 }
 
+def _make_session() -> aiohttp.ClientSession:
+    """Session with a connector tuned for sustained load: unlimited total
+    connections, generous keep-alive, and cached DNS, so client-side
+    handshake overhead doesn't cap the observed request rate."""
+    connector = aiohttp.TCPConnector(limit=0, limit_per_host=200,
+                                     keepalive_timeout=30, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+@asynccontextmanager
+async def _session_scope(session: aiohttp.ClientSession = None):
+    """Yield the caller's session if given, else a fresh one that we close"""
+    if session is not None:
+        yield session
+        return
+    fresh = _make_session()
+    try:
+        yield fresh
+    finally:
+        await fresh.close()
+
 async def make_request(session: aiohttp.ClientSession, endpoint: str, 
                       method: str = "GET", data: dict = None) -> Dict:
     """Make an async HTTP request"""
@@ -28,12 +50,14 @@ async def make_request(session: aiohttp.ClientSession, endpoint: str,
     start_time = time.time()
     try:
         if method.upper() == "GET":
-            async with session.get(url, headers=HEADERS) as response:
-                result = await response.json()
+            async with session.get(url, headers=HEADERS,
+                                   raise_for_status=False) as response:
+                result = orjson.loads(await response.read())
                 success = response.status == 200
         else:
-            async with session.post(url, headers=HEADERS, json=data) as response:
-                result = await response.json()
+            async with session.post(url, headers=HEADERS, json=data,
+                                    raise_for_status=False) as response:
+                result = orjson.loads(await response.read())
                 success = response.status == 200
         
         end_time = time.time()
@@ -54,11 +78,11 @@ async def make_request(session: aiohttp.ClientSession, endpoint: str,
         }
 
 @pytest.mark.asyncio
-async def test_concurrent_health_checks(num_requests: int = 10):
+async def test_concurrent_health_checks(num_requests: int = 10, session=None):
     """Test concurrent health check requests"""
     print(f"🔄 Testing {num_requests} concurrent health checks...")
     
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         tasks = [make_request(session, "/health") for _ in range(num_requests)]
         results = await asyncio.gather(*tasks)
     
@@ -77,11 +101,11 @@ async def test_concurrent_health_checks(num_requests: int = 10):
         assert len(successful) == num_requests, f"Expected all {num_requests} requests to succeed, but only {len(successful)} succeeded"
 
 @pytest.mark.asyncio
-async def test_concurrent_auth_requests(num_requests: int = 5):
+async def test_concurrent_auth_requests(num_requests: int = 5, session=None):
     """Test concurrent authenticated requests"""
     print(f"🔒 Testing {num_requests} concurrent authenticated requests...")
     
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         tasks = [make_request(session, "/stream/status") for _ in range(num_requests)]
         results = await asyncio.gather(*tasks)
     
@@ -99,7 +123,7 @@ async def test_concurrent_auth_requests(num_requests: int = 5):
         assert len(successful) == num_requests, f"Expected all {num_requests} requests to succeed, but only {len(successful)} succeeded"
 
 @pytest.mark.asyncio
-async def test_mixed_load(num_requests: int = 20):
+async def test_mixed_load(num_requests: int = 20, session=None):
     """Test mixed load with different endpoints"""
     print(f"🌊 Testing mixed load with {num_requests} requests...")
     
@@ -112,34 +136,38 @@ async def test_mixed_load(num_requests: int = 20):
         ("/cleanup", "POST", {}),
     ]
     
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         tasks = []
         for i in range(num_requests):
             endpoint, method, data = endpoints[i % len(endpoints)]
             tasks.append(make_request(session, endpoint, method, data))
         
         results = await asyncio.gather(*tasks)
-    
-    # Analyze results by endpoint
-    by_endpoint = {}
-    for result in results:
-        endpoint = result["endpoint"]
-        if endpoint not in by_endpoint:
-            by_endpoint[endpoint] = []
-        by_endpoint[endpoint].append(result)
-    
-    total_successful = 0
+
+    # Analyze results with preallocated arrays: vectorized reductions
+    # stay cheap at realistic request counts and give percentiles that
+    # the statistics module can't easily provide
+    endpoint_ids = {endpoint: i for i, (endpoint, _, _) in enumerate(endpoints)}
     total_requests = len(results)
-    
-    for endpoint, endpoint_results in by_endpoint.items():
-        successful = [r for r in endpoint_results if r["success"]]
-        response_times = [r["response_time"] for r in endpoint_results]
-        
-        print(f"   📡 {endpoint}: {len(successful)}/{len(endpoint_results)} success, "
-              f"avg {statistics.mean(response_times):.3f}s")
-        
-        total_successful += len(successful)
-    
+    times = np.zeros(total_requests, dtype=np.float64)
+    endpoint_idx = np.zeros(total_requests, dtype=np.int8)
+    ok = np.zeros(total_requests, dtype=bool)
+    for i, result in enumerate(results):
+        times[i] = result["response_time"]
+        endpoint_idx[i] = endpoint_ids[result["endpoint"]]
+        ok[i] = result["success"]
+
+    for endpoint, idx in endpoint_ids.items():
+        mask = endpoint_idx == idx
+        hits = int(mask.sum())
+        if hits:
+            print(f"   📡 {endpoint}: {int(ok[mask].sum())}/{hits} success, "
+                  f"avg {times[mask].mean():.3f}s")
+
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    print(f"   📈 Latency p50/p95/p99: {p50:.3f}s / {p95:.3f}s / {p99:.3f}s")
+
+    total_successful = int(ok.sum())
     success_rate = total_successful / total_requests
     print(f"   🎯 Overall success rate: {total_successful}/{total_requests} ({success_rate*100:.1f}%)")
     
@@ -150,12 +178,12 @@ async def test_mixed_load(num_requests: int = 20):
         assert success_rate > 0.8, f"Expected at least 80% success rate, got {success_rate*100:.1f}%"
 
 @pytest.mark.asyncio
-async def test_error_handling_load():
+async def test_error_handling_load(session=None):
     """Test error handling under load"""
     print("🚨 Testing error handling under load...")
     
     # Mix of valid and invalid requests
-    async with aiohttp.ClientSession() as session:
+    async with _session_scope(session) as session:
         tasks = [
             # Valid requests
             make_request(session, "/health"),
@@ -184,44 +212,46 @@ async def run_load_tests():
     print("🚀 Running Camera API Load Tests")
     print("=" * 60)
     
-    # Check if server is running
-    try:
-        async with aiohttp.ClientSession() as session:
+    # One session for every phase - per-phase sessions would redo
+    # TCP handshakes and DNS lookups, understating server throughput
+    async with _make_session() as session:
+        # Check if server is running
+        try:
             result = await make_request(session, "/health")
             if not result["success"]:
                 print("❌ Server is not running or not responding!")
                 return False
-    except Exception as e:
-        print(f"❌ Cannot connect to server: {e}")
-        return False
-    
-    print("✅ Server is responding, starting load tests...")
-    
-    # Run tests
-    tests = [
-        ("Concurrent Health Checks", test_concurrent_health_checks, 20),
-        ("Concurrent Auth Requests", test_concurrent_auth_requests, 10),
-        ("Mixed Load Test", test_mixed_load, 30),
-        ("Error Handling Load", test_error_handling_load, None),
-    ]
-    
-    results = {}
-    
-    for test_name, test_func, param in tests:
-        print(f"\n--- {test_name} ---")
-        try:
-            if param is not None:
-                result = await test_func(param)
-            else:
-                result = await test_func()
-            
-            results[test_name] = result
-            status = "✅ PASS" if result else "❌ FAIL"
-            print(f"   {status}")
-            
         except Exception as e:
-            print(f"   ❌ ERROR: {e}")
-            results[test_name] = False
+            print(f"❌ Cannot connect to server: {e}")
+            return False
+        
+        print("✅ Server is responding, starting load tests...")
+        
+        # Run tests
+        tests = [
+            ("Concurrent Health Checks", test_concurrent_health_checks, 20),
+            ("Concurrent Auth Requests", test_concurrent_auth_requests, 10),
+            ("Mixed Load Test", test_mixed_load, 30),
+            ("Error Handling Load", test_error_handling_load, None),
+        ]
+        
+        results = {}
+        
+        for test_name, test_func, param in tests:
+            print(f"\n--- {test_name} ---")
+            try:
+                if param is not None:
+                    result = await test_func(param, session=session)
+                else:
+                    result = await test_func(session=session)
+                
+                results[test_name] = result
+                status = "✅ PASS" if result else "❌ FAIL"
+                print(f"   {status}")
+                
+            except Exception as e:
+                print(f"   ❌ ERROR: {e}")
+                results[test_name] = False
     
     # Summary
     print("\n" + "=" * 60)
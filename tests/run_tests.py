@@ -4,21 +4,33 @@ Simple test runner script for the Camera Control API.
 Can be run without pytest for basic testing.
 """
 
-import requests
-import json
+import orjson
 import time
 import sys
 
+try:
+    from ._api_client import SESSION, session_with
+except ImportError:  # standalone execution: python tests/run_tests.py
+    from _api_client import SESSION, session_with
+
 # Configuration
-API_BASE = "http://localhost:5055"
-API_KEY = "dev-secret"
+API_BASE = "http://127.0.0.1:5055"  # Literal IP skips getaddrinfo per connection
+
+# The failing-auth checks get their own kept-alive sessions so they
+# reuse a connection too, instead of rebuilding header overrides on
+# the shared session each call
+SESSION_NOAUTH = session_with({"Content-Type": "application/json"},
+                              pool_connections=1, pool_maxsize=2)
+SESSION_WRONG = session_with({"x-api-key": "wrong-key",
+                              "Content-Type": "application/json"},
+                             pool_connections=1, pool_maxsize=2)
 
 def test_server_health():
     """Test if server is running and healthy"""
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
+        response = SESSION.get(f"{API_BASE}/health", timeout=5)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             return data.get("ok") is True
     except:
         pass
@@ -27,13 +39,12 @@ def test_server_health():
 def test_authentication():
     """Test API authentication"""
     # Test without API key
-    response = requests.post(f"{API_BASE}/camera/test", json={})
+    response = SESSION_NOAUTH.post(f"{API_BASE}/camera/test", json={})
     if response.status_code != 401:
         return False
     
     # Test with wrong API key
-    headers = {"x-api-key": "wrong-key", "Content-Type": "application/json"}
-    response = requests.post(f"{API_BASE}/camera/test", json={}, headers=headers)
+    response = SESSION_WRONG.post(f"{API_BASE}/camera/test", json={})
     if response.status_code != 401:
         return False
     
@@ -41,15 +52,14 @@ def test_authentication():
 
 def test_scan_surroundings():
     """Test scan surroundings endpoint"""
-    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
     data = {"count": 1}
     
     try:
-        response = requests.post(f"{API_BASE}/scan-surroundings", 
-                               json=data, headers=headers, timeout=30)
+        response = SESSION.post(f"{API_BASE}/scan-surroundings", 
+                               json=data, timeout=30)
         
         # Should return valid JSON response
-        result = response.json()
+        result = orjson.loads(response.content)
         
         if response.status_code == 200:
             return "photo_paths" in result.get("data", {})
@@ -63,21 +73,19 @@ def test_scan_surroundings():
 
 def test_stream_endpoints():
     """Test streaming endpoints"""
-    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
-    
     # Test stream status
     try:
-        response = requests.get(f"{API_BASE}/stream/status", headers=headers, timeout=10)
+        response = SESSION.get(f"{API_BASE}/stream/status", timeout=10)
         if response.status_code != 200:
             return False
         
         # Test stream start (may fail due to camera, but should have proper response)
         stream_data = {"width": 640, "height": 480, "framerate": 15}
-        response = requests.post(f"{API_BASE}/stream/start", 
-                               json=stream_data, headers=headers, timeout=10)
+        response = SESSION.post(f"{API_BASE}/stream/start", 
+                               json=stream_data, timeout=10)
         
         # Should return proper JSON (success or error)
-        result = response.json()
+        result = orjson.loads(response.content)
         return "success" in result or "detail" in result
         
     except Exception as e:
@@ -86,15 +94,14 @@ def test_stream_endpoints():
 
 def test_capture_endpoint():
     """Test frame capture endpoint"""
-    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
     data = {"width": 640, "height": 480}
     
     try:
-        response = requests.post(f"{API_BASE}/capture", 
-                               json=data, headers=headers, timeout=30)
+        response = SESSION.post(f"{API_BASE}/capture", 
+                               json=data, timeout=30)
         
         # Should return valid JSON response
-        result = response.json()
+        result = orjson.loads(response.content)
         
         if response.status_code == 200:
             return "frame_path" in result.get("data", {})
@@ -108,11 +115,9 @@ def test_capture_endpoint():
 
 def test_validation():
     """Test input validation"""
-    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
-    
     # Test invalid scan count
-    response = requests.post(f"{API_BASE}/scan-surroundings", 
-                           json={"count": 0}, headers=headers, timeout=10)
+    response = SESSION.post(f"{API_BASE}/scan-surroundings", 
+                           json={"count": 0}, timeout=10)
     
     return response.status_code == 422  # Validation error
 
@@ -158,6 +163,12 @@ def run_quick_tests():
     print("=" * 50)
     print(f"📊 Summary: {passed}/{total} tests passed ({(passed/total)*100:.1f}%)")
     
+    SESSION.close()
+    
+    SESSION_NOAUTH.close()
+    
+    SESSION_WRONG.close()
+
     if passed == total:
         print("🎉 All tests passed! API is working correctly.")
         return True
@@ -4,46 +4,105 @@ Comprehensive test suite for the FastAPI Camera Control API.
 Tests all endpoints, authentication, error handling, and integration scenarios.
 """
 
+import asyncio
+import httpx
+import msgspec
+import orjson
 import pytest
 import requests
-import json
-import time
 import os
-from typing import Dict, Any, Optional
-from pathlib import Path
+import sys
+from typing import Dict, Optional
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from router.server import app
+
+try:
+    from ._api_client import API_KEY, HEADERS, SESSION
+except ImportError:  # standalone execution: python tests/test_camera_api.py
+    from _api_client import API_KEY, HEADERS, SESSION
 
 # Test configuration
-API_BASE = "http://localhost:5056"  # Updated to test server port
-API_KEY = "dev-secret"
+API_BASE = "http://127.0.0.1:5056"  # Literal IP skips getaddrinfo per connection
 WRONG_API_KEY = "wrong-key"
-HEADERS = {
-    "x-api-key": API_KEY,
-    "Content-Type": "application/json"
-}
 WRONG_HEADERS = {
     "x-api-key": WRONG_API_KEY,
     "Content-Type": "application/json"
 }
 
+@pytest.fixture(scope="module", autouse=True)
+def _session_teardown():
+    yield
+    SESSION.close()
+
+# In-process ASGI client for auth/validation/shape tests: requests go
+# straight into the app without a socket or a running server, so these
+# tests stay fast and work in CI without booting uvicorn. Tests that
+# exercise real camera/stream behavior keep using SESSION and carry
+# the integration marker.
+CLIENT = TestClient(app)
+
+def _json(response):
+    """Decode a response body with orjson's C parser"""
+    return orjson.loads(response.content)
+
 def _check_server_running() -> bool:
     """Check if the API server is running"""
     try:
-        response = requests.get(f"{API_BASE}/health", timeout=2)
+        response = SESSION.get(f"{API_BASE}/health", timeout=2)
         return response.status_code == 200
     except:
         return False
 
-def _make_request(method: str, endpoint: str, data: Optional[Dict] = None, 
-                 headers: Optional[Dict] = None, expect_success: bool = True) -> requests.Response:
-    """Helper method to make API requests"""
-    url = f"{API_BASE}{endpoint}"
-    headers = headers or HEADERS
+# Tight (connect, read) timeouts bound the worst case: a hung server
+# costs seconds, not 30s multiplied across the suite. Endpoints that
+# genuinely wait on the camera get a longer read timeout.
+DEFAULT_TIMEOUT = (1.0, 5.0)
+CAMERA_TIMEOUT = (1.0, 15.0)
+_SLOW_ENDPOINTS = ("/scan-surroundings", "/record/start", "/camera/test", "/capture")
+
+# Request bodies the integration tests reuse, serialized once at import
+# with orjson instead of re-encoding the same dict literal per call.
+# Content-Type is already a session default, so the pre-encoded bytes
+# go straight out via data=.
+_PAYLOAD_EMPTY = b"{}"
+_PAYLOAD_CAPTURE_640 = orjson.dumps({"width": 640, "height": 480})
+_PAYLOAD_SCAN_1 = orjson.dumps({"count": 1})
+_PAYLOAD_STREAM_640 = orjson.dumps(
+    {"width": 640, "height": 480, "framerate": 15, "bitrate": 2000000})
+_PAYLOAD_RECORD_5S = orjson.dumps({"duration": 5, "width": 640, "height": 480})
+_PAYLOAD_STOP_INVALID = orjson.dumps({"recording_id": "invalid_id"})
+
+# Formatted URLs, built once per endpoint instead of per request
+_URLS: Dict[str, str] = {}
+
+# Typed response schema for the capture endpoint: msgspec decodes and
+# validates the shape in one C-level pass, and a missing field fails
+# the decode instead of needing per-key asserts
+class _CaptureData(msgspec.Struct):
+    frame_path: str
+    width: int
+    height: int
+
+class _CaptureResp(msgspec.Struct):
+    success: bool
+    data: _CaptureData
+
+def _make_request(method: str, endpoint: str, data: Optional[bytes] = None, 
+                 headers: Optional[Dict] = None,
+                 timeout: Optional[tuple] = None) -> requests.Response:
+    """Helper method to make API requests (data is pre-encoded JSON bytes)"""
+    url = _URLS.setdefault(endpoint, f"{API_BASE}{endpoint}")
+    if timeout is None:
+        timeout = CAMERA_TIMEOUT if endpoint in _SLOW_ENDPOINTS else DEFAULT_TIMEOUT
     
     try:
         if method.upper() == "GET":
-            response = requests.get(url, headers=headers, timeout=30)
+            response = SESSION.get(url, headers=headers, timeout=timeout)
         elif method.upper() == "POST":
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            response = SESSION.post(url, data=data, headers=headers, timeout=timeout)
         else:
             raise ValueError(f"Unsupported method: {method}")
         
@@ -54,24 +113,24 @@ def _make_request(method: str, endpoint: str, data: Optional[Dict] = None,
 # Health and Info Tests
 def test_health_check_no_auth():
     """Test health endpoint without authentication"""
-    response = requests.get(f"{API_BASE}/health", timeout=5)
+    response = CLIENT.get("/health")
     
     assert response.status_code == 200
-    data = response.json()
+    data = _json(response)
     assert data["ok"] is True
     assert data["status"] == "healthy"
     assert data["service"] == "camera-control-api"
+
+def test_api_info_no_auth():
+    """Test API info endpoint without authentication"""
+    response = CLIENT.get("/api")
     
-    def test_api_info_no_auth(self):
-        """Test API info endpoint without authentication"""
-        response = requests.get(f"{API_BASE}/api", timeout=5)
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["service"] == "Camera Control API"
-        assert data["version"] == "1.0.0"
-        assert "endpoints" in data
-        assert "hls_stream" in data
+    assert response.status_code == 200
+    data = _json(response)
+    assert data["service"] == "Camera Control API"
+    assert data["version"] == "1.0.0"
+    assert "endpoints" in data
+    assert "hls_stream" in data
 
 class TestAuthentication:
     """Test authentication related endpoints"""
@@ -79,34 +138,35 @@ class TestAuthentication:
     def test_endpoint_requires_auth(self):
         """Test that protected endpoints require authentication"""
         # Test without any headers
-        response = requests.post(f"{API_BASE}/camera/test", json={})
+        response = CLIENT.post("/camera/test", json={})
         assert response.status_code == 401
         
         # Test with wrong API key
-        response = requests.post(f"{API_BASE}/camera/test", json={}, headers=WRONG_HEADERS)
+        response = CLIENT.post("/camera/test", json={}, headers=WRONG_HEADERS)
         assert response.status_code == 401
         
-        # Test with correct API key (may fail due to camera, but should pass auth)
-        response = requests.post(f"{API_BASE}/camera/test", json={}, headers=HEADERS)
+        # Test with correct API key on a camera-free endpoint
+        response = CLIENT.get("/stream/status", headers=HEADERS)
         assert response.status_code != 401  # Should not be auth error
     
     def test_auth_error_messages(self):
         """Test authentication error messages"""
-        response = requests.post(f"{API_BASE}/camera/test", json={})
+        response = CLIENT.post("/camera/test", json={})
         assert response.status_code == 401
-        data = response.json()
+        data = _json(response)
         assert "Invalid or missing API key" in data["detail"]
 
 class TestCameraEndpoints:
     """Test camera-related endpoints"""
     
+    @pytest.mark.integration
     def test_camera_test_endpoint(self):
         """Test camera connection test endpoint"""
-        response = _make_request("POST", "/camera/test", {})
+        response = _make_request("POST", "/camera/test", _PAYLOAD_EMPTY)
         
         # Should return proper JSON structure regardless of camera connection
         assert response.status_code in [200, 500]  # 500 if camera not connected
-        data = response.json()
+        data = _json(response)
         
         if response.status_code == 200:
             assert data["success"] in [True, False]
@@ -117,49 +177,42 @@ class TestCameraEndpoints:
             # Server error due to camera connection issues
             assert "error" in data["detail"].lower() or "camera" in data["detail"].lower()
     
+    @pytest.mark.integration
     def test_capture_endpoint_structure(self):
         """Test capture endpoint request/response structure"""
-        capture_data = {
-            "width": 640,
-            "height": 480
-        }
-        
-        response = _make_request("POST", "/capture", capture_data)
+        response = _make_request("POST", "/capture", _PAYLOAD_CAPTURE_640)
         
         # Should return proper structure even if capture fails
         assert response.status_code in [200, 500]
-        data = response.json()
         
         if response.status_code == 200:
-            assert data["success"] is True
-            assert "frame_path" in data["data"]
-            assert data["data"]["width"] == 640
-            assert data["data"]["height"] == 480
-    
-    def test_capture_validation(self):
+            # Decode raises if success/data/frame_path are missing or
+            # mistyped, covering the old per-key asserts
+            resp = msgspec.json.decode(response.content, type=_CaptureResp)
+            assert resp.success is True
+            assert resp.data.width == 640
+            assert resp.data.height == 480
+    
+    @pytest.mark.parametrize("invalid_data", [
+        {"width": 99, "height": 480},    # Width too small
+        {"width": 640, "height": 50000},  # Height too large
+    ])
+    def test_capture_validation(self, invalid_data):
         """Test capture endpoint input validation"""
-        # Test with invalid width
-        invalid_data = {"width": 99, "height": 480}  # Too small
-        response = _make_request("POST", "/capture", invalid_data)
-        assert response.status_code == 422  # Validation error
-        
-        # Test with invalid height
-        invalid_data = {"width": 640, "height": 50000}  # Too large
-        response = _make_request("POST", "/capture", invalid_data)
+        response = CLIENT.post("/capture", json=invalid_data, headers=HEADERS)
         assert response.status_code == 422  # Validation error
 
 class TestScanSurroundings:
     """Test scan surroundings endpoint"""
     
+    @pytest.mark.integration
     def test_scan_surroundings_structure(self):
         """Test scan surroundings endpoint structure"""
-        scan_data = {"count": 1}  # Minimal test
-        
-        response = _make_request("POST", "/scan-surroundings", scan_data)
+        response = _make_request("POST", "/scan-surroundings", _PAYLOAD_SCAN_1)
         
         # Should return proper structure
         assert response.status_code in [200, 500]
-        data = response.json()
+        data = _json(response)
         
         if response.status_code == 200:
             assert data["success"] is True
@@ -167,136 +220,123 @@ class TestScanSurroundings:
             assert "count" in data["data"]
             assert isinstance(data["data"]["photo_paths"], list)
     
-    def test_scan_validation(self):
+    @pytest.mark.parametrize("invalid_data", [
+        {"count": 25},  # Max is 20
+        {"count": 0},   # Min is 1
+    ])
+    def test_scan_validation(self, invalid_data):
         """Test scan surroundings input validation"""
-        # Test with invalid count (too high)
-        invalid_data = {"count": 25}  # Max is 20
-        response = _make_request("POST", "/scan-surroundings", invalid_data)
-        assert response.status_code == 422
-        
-        # Test with invalid count (too low)
-        invalid_data = {"count": 0}  # Min is 1
-        response = _make_request("POST", "/scan-surroundings", invalid_data)
+        response = CLIENT.post("/scan-surroundings", json=invalid_data, headers=HEADERS)
         assert response.status_code == 422
     
+    @pytest.mark.integration
     def test_scan_default_values(self):
         """Test scan surroundings with default values"""
-        response = _make_request("POST", "/scan-surroundings", {})
+        response = _make_request("POST", "/scan-surroundings", _PAYLOAD_EMPTY)
         
         # Should accept empty body and use defaults
         assert response.status_code in [200, 500]
 
+@pytest.mark.xdist_group(name="camera_hw")
 class TestStreamEndpoints:
-    """Test streaming endpoints"""
+    """Test streaming endpoints (single xdist worker: shared stream state)"""
     
+    @pytest.mark.integration
     def test_stream_status_initial(self):
         """Test initial stream status"""
         response = _make_request("GET", "/stream/status")
         
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["success"] is True
         assert "data" in data
         # Should contain streaming status info
         assert "streaming" in data["data"]
     
-    def test_stream_start_validation(self):
+    @pytest.mark.parametrize("invalid_data", [
+        {"framerate": 100},  # Max is 60
+        {"bitrate": 100},    # Too low
+    ])
+    def test_stream_start_validation(self, invalid_data):
         """Test stream start input validation"""
-        # Test with invalid framerate
-        invalid_data = {"framerate": 100}  # Max is 60
-        response = _make_request("POST", "/stream/start", invalid_data)
-        assert response.status_code == 422
-        
-        # Test with invalid bitrate
-        invalid_data = {"bitrate": 100}  # Too low
-        response = _make_request("POST", "/stream/start", invalid_data)
+        response = CLIENT.post("/stream/start", json=invalid_data, headers=HEADERS)
         assert response.status_code == 422
     
+    @pytest.mark.integration
     def test_stream_start_structure(self):
         """Test stream start endpoint structure"""
-        stream_data = {
-            "width": 640,
-            "height": 480,
-            "framerate": 15,
-            "bitrate": 2000000
-        }
-        
-        response = _make_request("POST", "/stream/start", stream_data)
+        response = _make_request("POST", "/stream/start", _PAYLOAD_STREAM_640)
         
         # Should return proper structure
         assert response.status_code in [200, 500]
-        data = response.json()
+        data = _json(response)
         
         if response.status_code == 200:
             assert data["success"] is True
             assert "data" in data
     
+    @pytest.mark.integration
     def test_stream_stop(self):
         """Test stream stop endpoint"""
         response = _make_request("POST", "/stream/stop")
         
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert "success" in data
 
+@pytest.mark.xdist_group(name="camera_hw")
 class TestRecordingEndpoints:
-    """Test recording endpoints"""
+    """Test recording endpoints (single xdist worker: shared camera)"""
     
+    @pytest.mark.integration
     def test_recording_status_initial(self):
         """Test initial recording status"""
         response = _make_request("GET", "/record/status")
         
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["success"] is True
         assert "data" in data
     
-    def test_recording_start_validation(self):
+    @pytest.mark.parametrize("invalid_data", [
+        {"duration": 0},     # Min is 1
+        {"duration": 4000},  # Max is 3600
+    ])
+    def test_recording_start_validation(self, invalid_data):
         """Test recording start input validation"""
-        # Test with invalid duration
-        invalid_data = {"duration": 0}  # Min is 1
-        response = _make_request("POST", "/record/start", invalid_data)
-        assert response.status_code == 422
-        
-        # Test with duration too long
-        invalid_data = {"duration": 4000}  # Max is 3600
-        response = _make_request("POST", "/record/start", invalid_data)
+        response = CLIENT.post("/record/start", json=invalid_data, headers=HEADERS)
         assert response.status_code == 422
     
+    @pytest.mark.integration
     def test_recording_start_structure(self):
         """Test recording start endpoint structure"""
-        record_data = {
-            "duration": 5,  # Short test
-            "width": 640,
-            "height": 480
-        }
-        
-        response = _make_request("POST", "/record/start", record_data)
+        response = _make_request("POST", "/record/start", _PAYLOAD_RECORD_5S)
         
         # Should return proper structure
         assert response.status_code in [200, 500]
-        data = response.json()
+        data = _json(response)
         
         if response.status_code == 200:
             assert data["success"] is True
             assert "recording_id" in data["data"]
     
+    @pytest.mark.integration
     def test_recording_stop_invalid_id(self):
         """Test stopping non-existent recording"""
-        stop_data = {"recording_id": "invalid_id"}
-        response = _make_request("POST", "/record/stop", stop_data)
+        response = _make_request("POST", "/record/stop", _PAYLOAD_STOP_INVALID)
         
         assert response.status_code == 404  # Not found
 
 class TestCleanupEndpoint:
     """Test cleanup endpoint"""
     
+    @pytest.mark.integration
     def test_cleanup_structure(self):
         """Test cleanup endpoint structure"""
         response = _make_request("POST", "/cleanup")
         
         assert response.status_code == 200
-        data = response.json()
+        data = _json(response)
         assert data["success"] is True
         assert "cleaned_recordings" in data["data"]
         assert isinstance(data["data"]["cleaned_recordings"], int)
@@ -306,14 +346,14 @@ class TestHLSEndpoints:
     
     def test_hls_playlist_not_found(self):
         """Test HLS playlist when stream not running"""
-        response = requests.get(f"{API_BASE}/stream.m3u8")
+        response = CLIENT.get("/stream.m3u8")
         
         # Should return 404 if no stream is active
         assert response.status_code == 404
     
     def test_hls_segment_not_found(self):
         """Test HLS segment when not available"""
-        response = requests.get(f"{API_BASE}/stream_001.ts")
+        response = CLIENT.get("/stream_001.ts")
         
         # Should return 404 if segment doesn't exist
         assert response.status_code == 404
@@ -330,14 +370,14 @@ class TestCORSAndSecurity:
             "Access-Control-Request-Headers": "x-api-key,content-type"
         }
         
-        response = requests.options(f"{API_BASE}/camera/test", headers=headers)
+        response = CLIENT.options("/camera/test", headers=headers)
         
         # Should handle CORS properly
         assert response.status_code in [200, 204]
         
-        # Check for CORS headers
-        cors_headers = response.headers
-        assert "Access-Control-Allow-Origin" in cors_headers or "access-control-allow-origin" in cors_headers
+        # Check for CORS headers (header lookup is case-insensitive,
+        # so a single membership test covers both spellings)
+        assert "access-control-allow-origin" in response.headers
 
 class TestErrorHandling:
     """Test error handling and edge cases"""
@@ -347,19 +387,20 @@ class TestErrorHandling:
         headers = {**HEADERS, "Content-Type": "application/json"}
         
         # Send malformed JSON
-        response = requests.post(
-            f"{API_BASE}/capture", 
-            data='{"invalid": json}',  # Malformed JSON
+        response = CLIENT.post(
+            "/capture",
+            content='{"invalid": json}',  # Malformed JSON
             headers=headers
         )
         
         assert response.status_code == 422  # Validation error
     
+    @pytest.mark.integration
     def test_missing_content_type(self):
         """Test request without content-type header"""
         headers = {"x-api-key": API_KEY}  # No content-type
         
-        response = requests.post(
+        response = SESSION.post(
             f"{API_BASE}/capture",
             json={"width": 640},
             headers=headers
@@ -370,96 +411,52 @@ class TestErrorHandling:
     
     def test_nonexistent_endpoint(self):
         """Test accessing non-existent endpoint"""
-        response = requests.get(f"{API_BASE}/nonexistent", headers=HEADERS)
+        response = CLIENT.get("/nonexistent", headers=HEADERS)
         assert response.status_code == 404
 
 # Integration test scenarios
+@pytest.mark.xdist_group(name="camera_hw")
 class TestIntegrationScenarios:
-    """Test complete workflow scenarios"""
-    
-    def test_basic_workflow(self):
-        """Test a basic camera workflow"""
-        # 1. Check camera status
-        response = _make_request("POST", "/camera/test")
-        assert response.status_code in [200, 500]
-        
-        # 2. Check stream status
-        response = _make_request("GET", "/stream/status")
-        assert response.status_code == 200
-        
-        # 3. Try to capture a frame
-        response = _make_request("POST", "/capture", {"width": 640, "height": 480})
-        assert response.status_code in [200, 500]
-        
-        # 4. Cleanup
-        response = _make_request("POST", "/cleanup")
-        assert response.status_code == 200
+    """Test complete workflow scenarios (single xdist worker)"""
+    
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_basic_workflow(self):
+        """Test a basic camera workflow with overlapped requests"""
+        # The four calls are independent, so fire them concurrently over
+        # one pooled keep-alive connection set instead of paying a full
+        # round trip for each in sequence
+        async with httpx.AsyncClient(base_url=API_BASE, headers=HEADERS,
+                                     timeout=30.0) as client:
+            camera, status, capture, cleanup = await asyncio.gather(
+                client.post("/camera/test", json={}),
+                client.get("/stream/status"),
+                client.post("/capture", json={"width": 640, "height": 480}),
+                client.post("/cleanup"),
+            )
+
+        assert camera.status_code in [200, 500]
+        assert status.status_code == 200
+        assert capture.status_code in [200, 500]
+        assert cleanup.status_code == 200
 
-# Custom test runner for standalone execution
+# Standalone execution delegates to pytest's collector instead of a
+# hand-rolled reflection loop, so module-level and class-based tests
+# are discovered uniformly and integration tests skip when no server
+# is up
 def run_tests():
-    """Run tests without pytest (for standalone execution)"""
-    import sys
-    
+    """Run this file's tests via pytest (for standalone execution)"""
     print("🧪 Running Camera Control API Tests")
     print("=" * 60)
-    
-    # Check if server is running
+
     if not _check_server_running():
-        print("❌ Server is not running!")
-        print("Please start the server first:")
+        print("⚠️ Server is not running - live-server tests will be skipped.")
+        print("Start it with:")
         print("BACKEND_API_KEY=dev-secret uvicorn router.server:app --host 0.0.0.0 --port 5056 --reload")
-        return False
-    
-    print("✅ Server is running, starting tests...")
-    
-    # Run test classes manually
-    test_classes = [
-        TestHealthAndInfo,
-        TestAuthentication,
-        TestCameraEndpoints,
-        TestScanSurroundings,
-        TestStreamEndpoints,
-        TestRecordingEndpoints,
-        TestCleanupEndpoint,
-        TestHLSEndpoints,
-        TestCORSAndSecurity,
-        TestErrorHandling,
-        TestIntegrationScenarios
-    ]
-    
-    total_tests = 0
-    passed_tests = 0
-    
-    for test_class in test_classes:
-        print(f"\n--- {test_class.__name__} ---")
-        instance = test_class()
-        instance.setup_class()
-        
-        # Get all test methods
-        test_methods = [method for method in dir(instance) if method.startswith('test_')]
-        
-        for test_method in test_methods:
-            total_tests += 1
-            try:
-                method = getattr(instance, test_method)
-                method()
-                print(f"  ✅ {test_method}")
-                passed_tests += 1
-            except Exception as e:
-                print(f"  ❌ {test_method}: {str(e)}")
-    
-    # Summary
-    print("\n" + "=" * 60)
-    print(f"📊 Test Results: {passed_tests}/{total_tests} passed ({(passed_tests/total_tests)*100:.1f}%)")
-    
-    if passed_tests == total_tests:
-        print("🎉 All tests passed!")
-        return True
-    else:
-        print("⚠️ Some tests failed. Check the output above.")
-        return False
+
+    return pytest.main(["-n", "auto", "--tb=short", __file__]) == 0
 
 if __name__ == "__main__":
     # Run tests standalone
     success = run_tests()
-    exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success else 1)
\ No newline at end of file
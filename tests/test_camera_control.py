@@ -4,10 +4,12 @@ Comprehensive test script for the enhanced camera control system.
 This script tests all the new functionality including streaming, recording, and frame capture.
 """
 
+import atexit
 import sys
 import time
 import os
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add the project root to the path to import camera module
@@ -15,6 +17,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from camera.control import CameraController, quick_stream, quick_capture, quick_record
 
+# One shared controller for the whole suite - each construction would
+# otherwise redo SSH/connection setup against the Pi
+_controller = None
+
+def get_controller():
+    global _controller
+    if _controller is None:
+        _controller = CameraController()
+        atexit.register(_controller.close_ssh_master)
+    return _controller
+
 def test_camera_connection(camera_available, mock_camera_controller):
     """Test basic camera connection"""
     print("🔍 Testing camera connection...")
@@ -23,7 +36,7 @@ def test_camera_connection(camera_available, mock_camera_controller):
         controller = mock_camera_controller
         print("Using mock controller (no camera hardware)")
     else:
-        controller = CameraController()
+        controller = get_controller()
     
     success = controller.test_camera_connection()
     assert success, "Camera connection failed!"
@@ -44,17 +57,19 @@ def test_frame_capture(camera_available, mock_camera_controller):
         controller = mock_camera_controller
         print("Using mock controller (no camera hardware)")
     else:
-        controller = CameraController()
+        controller = get_controller()
     
     # Test basic frame capture
     frame_path = controller.capture_frame()
     assert frame_path is not None, "Frame capture returned None"
     print(f"✅ Frame captured successfully: {frame_path}")
     
-    # For real hardware, check file exists and has content
+    # For real hardware, check file exists and has content (one stat call)
     if camera_available:
-        assert os.path.exists(frame_path), f"Frame file does not exist: {frame_path}"
-        file_size = os.path.getsize(frame_path)
+        try:
+            file_size = os.stat(frame_path).st_size
+        except FileNotFoundError:
+            assert False, f"Frame file does not exist: {frame_path}"
         print(f"   File size: {file_size} bytes")
         assert file_size > 0, "Frame file is empty"
 
@@ -87,7 +102,7 @@ def test_streaming(camera_available, mock_camera_controller):
         controller = mock_camera_controller
         print("Using mock controller (no camera hardware)")
     else:
-        controller = CameraController()
+        controller = get_controller()
     
     # Start stream
     print("Starting stream...")
@@ -130,7 +145,7 @@ def test_streaming(camera_available, mock_camera_controller):
 def test_recording():
     """Test video recording functionality"""
     print("\n🎬 Testing video recording...")
-    controller = CameraController()
+    controller = get_controller()
     
     # Start recording
     print("Starting 10-second recording...")
@@ -138,34 +153,21 @@ def test_recording():
     
     assert recording_id is not None, "Failed to start recording!"
     print(f"✅ Recording started: {recording_id}")
-    
-    # Monitor recording progress
-    start_time = time.time()
-    while time.time() - start_time < 11:  # Give extra time
-        status = controller.get_recording_status(recording_id)
-        if 'error' in status:
-            print(f"❌ Recording error: {status['error']}")
-            break
-        
-        if not status.get('is_active', False):
-            print("✅ Recording completed")
-            break
-        
-        progress = status.get('progress_percent', 0)
-        remaining = status.get('remaining_time', 0)
-        print(f"\r   Progress: {progress:.1f}% - {remaining:.1f}s remaining", end='')
-        time.sleep(1)
-    
-    print()  # New line after progress
+
+    # Block on completion instead of polling status every second
+    if controller.wait_for_recording(recording_id, timeout=11):
+        print("✅ Recording completed")
+    else:
+        print("❌ Recording did not finish in time")
     
     # Check if recording file exists
     final_status = controller.get_recording_status(recording_id)
     if 'output_path' in final_status:
         output_path = final_status['output_path']
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
+        try:
+            file_size = os.stat(output_path).st_size
             print(f"✅ Recording saved: {output_path} ({file_size} bytes)")
-        else:
+        except FileNotFoundError:
             print(f"❌ Recording file not found: {output_path}")
             assert False, f"Recording file not found: {output_path}"
     
@@ -188,7 +190,7 @@ def test_camera_settings(camera_available, mock_camera_controller):
         controller = mock_camera_controller
         print("Using mock controller (no camera hardware)")
     else:
-        controller = CameraController()
+        controller = get_controller()
     
     # Test setting different resolutions
     settings = {
@@ -210,7 +212,7 @@ def test_status_monitoring(camera_available, mock_camera_controller):
         controller = mock_camera_controller
         print("Using mock controller (no camera hardware)")
     else:
-        controller = CameraController()
+        controller = get_controller()
     
     # Get initial status
     stream_status = controller.get_stream_status()
@@ -229,30 +231,49 @@ def test_status_monitoring(camera_available, mock_camera_controller):
     print("✅ Status monitoring working")
 
 def run_comprehensive_test():
-    """Run all tests in sequence"""
+    """Run all tests, overlapping the independent I/O-bound ones"""
     print("🚀 Starting comprehensive camera control test suite...")
     print("=" * 60)
-    
-    tests = [
-        ("Camera Connection", test_camera_connection),
+
+    # Independent tests block on camera/network I/O, so a small thread
+    # pool turns their phase from sum-of-latencies into max-of-latencies
+    concurrent_tests = [
         ("Frame Capture", test_frame_capture),
         ("Quick Functions", test_quick_functions),
+        ("Camera Settings", test_camera_settings),
+        ("Status Monitoring", test_status_monitoring),
+    ]
+    # Streaming/recording fight over the camera hardware - keep serial
+    serial_tests = [
         ("Video Streaming", test_streaming),
         ("Video Recording", test_recording),
         ("Quick Record", test_quick_record),
-        ("Camera Settings", test_camera_settings),
-        ("Status Monitoring", test_status_monitoring),
     ]
-    
+
     results = {}
-    
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
+
+    def _run(test_name, test_func):
         try:
-            results[test_name] = test_func()
+            return test_func()
         except Exception as e:
             print(f"❌ Test '{test_name}' failed with exception: {e}")
-            results[test_name] = False
+            return False
+
+    # Connection gate first, on its own
+    print(f"\n{'='*20} Camera Connection {'='*20}")
+    results["Camera Connection"] = _run("Camera Connection", test_camera_connection)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {
+            test_name: pool.submit(_run, test_name, test_func)
+            for test_name, test_func in concurrent_tests
+        }
+        for test_name, future in futures.items():
+            results[test_name] = future.result()
+
+    for test_name, test_func in serial_tests:
+        print(f"\n{'='*20} {test_name} {'='*20}")
+        results[test_name] = _run(test_name, test_func)
     
     # Summary
     print("\n" + "="*60)
@@ -1,74 +1,165 @@
-from Detic.pipeline import predict_pipe_line
-import cv2
+# Heavy dependencies (torch/CUDA, detectron2 via Detic, OpenCV) are
+# imported lazily where needed: importing them at module top costs
+# seconds on every test collection and CLI --help invocation
+import logging
+import numpy as np
+import orjson
 import os
-import torch
+import sys
+from functools import lru_cache
 from typing import List, Dict, Any
 
+logger = logging.getLogger(__name__)
+
+# Vocabulary -> class-name lookup, built once per distinct vocabulary
+# instead of branching and f-string formatting per detection
+_CLASS_MAP_CACHE: Dict[tuple, Dict[int, str]] = {}
+
+def _class_map(object_list: List[str]) -> Dict[int, str]:
+    key = tuple(object_list) if object_list else ()
+    class_map = _CLASS_MAP_CACHE.get(key)
+    if class_map is None:
+        class_map = dict(enumerate(key))
+        _CLASS_MAP_CACHE[key] = class_map
+    return class_map
+
+class Frame:
+    """Per-frame context shared by every detection in the frame.
+
+    One instance carries the image size and its reciprocals, so 500
+    detections reference one Frame instead of each storing redundant
+    copies of the dimensions.
+    """
+    __slots__ = ('width', 'height', 'inv_width', 'inv_height')
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        # Reciprocals turn normalization divisions into multiplications
+        self.inv_width = 1.0 / width
+        self.inv_height = 1.0 / height
+
+@lru_cache(maxsize=8)
+def _frame_for(width: int, height: int) -> Frame:
+    """Frames from the same camera share one cached context"""
+    return Frame(width, height)
+
 class DetectedObject:
     """Class to represent a detected object with its coordinates and metadata"""
     
-    def __init__(self, class_name: str, confidence: float, bbox: torch.Tensor, 
-                 image_width: int, image_height: int):
+    # Slots shrink per-object memory and speed attribute access when
+    # hundreds of detections are built per frame; the trailing slots
+    # memoize the derived dicts (built at most once per object)
+    __slots__ = ('class_name', 'confidence', 'bbox_tensor', '_frame',
+                 'x1', 'y1', 'x2', 'y2',
+                 'width', 'height', 'center_x', 'center_y', 'area',
+                 '_corners', '_normalized_coords', '_dict')
+    
+    def __init__(self, class_name: str, confidence: float, bbox, 
+                 image_width: int, image_height: int, stats: tuple = None):
         self.class_name = class_name
-        self.confidence = confidence
-        self.bbox_tensor = bbox  # Original tensor format
-        self.image_width = image_width
-        self.image_height = image_height
+        self.confidence = float(confidence)
+        # If torch was never imported, bbox cannot be a tensor - check
+        # via sys.modules so constructing objects from plain arrays
+        # doesn't force the CUDA stack to load
+        torch = sys.modules.get('torch')
+        is_tensor = torch is not None and isinstance(bbox, torch.Tensor)
+        self.bbox_tensor = bbox if is_tensor else None
+        self._frame = _frame_for(image_width, image_height)
+        
+        # Extract coordinates (format: [x1, y1, x2, y2]). Batched
+        # callers pass a row view of an already-transferred array, so
+        # no per-instance device sync happens here. tolist() converts
+        # the whole row to native Python floats in one C call - both
+        # ndarrays and tensors support it, with no per-element scalar
+        # boxing and no .cpu().numpy() round-trip for tensors.
+        if hasattr(bbox, 'tolist'):
+            self.x1, self.y1, self.x2, self.y2 = bbox.tolist()
+        else:
+            self.x1, self.y1, self.x2, self.y2 = (float(c) for c in bbox)
         
-        # Extract coordinates from tensor (format: [x1, y1, x2, y2])
-        coords = bbox.cpu().numpy()
-        self.x1, self.y1, self.x2, self.y2 = coords
+        # Derived properties, precomputed as vector ops by
+        # extract_detected_objects when available
+        if stats is not None:
+            self.width, self.height, self.center_x, self.center_y, self.area = (
+                float(s) for s in stats)
+        else:
+            self.width = self.x2 - self.x1
+            self.height = self.y2 - self.y1
+            self.center_x = (self.x1 + self.x2) / 2
+            self.center_y = (self.y1 + self.y2) / 2
+            self.area = self.width * self.height
         
-        # Calculate additional useful properties
-        self.width = self.x2 - self.x1
-        self.height = self.y2 - self.y1
-        self.center_x = (self.x1 + self.x2) / 2
-        self.center_y = (self.y1 + self.y2) / 2
-        self.area = self.width * self.height
+        self._corners = None
+        self._normalized_coords = None
+        self._dict = None
         
     def get_corners(self) -> Dict[str, tuple]:
-        """Get all four corner coordinates"""
-        return {
-            'top_left': (self.x1, self.y1),
-            'top_right': (self.x2, self.y1),
-            'bottom_left': (self.x1, self.y2),
-            'bottom_right': (self.x2, self.y2)
-        }
+        """Get all four corner coordinates (memoized)"""
+        if self._corners is None:
+            self._corners = {
+                'top_left': (self.x1, self.y1),
+                'top_right': (self.x2, self.y1),
+                'bottom_left': (self.x1, self.y2),
+                'bottom_right': (self.x2, self.y2)
+            }
+        return self._corners
+    
+    @property
+    def image_width(self) -> int:
+        return self._frame.width
+    
+    @property
+    def image_height(self) -> int:
+        return self._frame.height
     
     def get_normalized_coords(self) -> Dict[str, float]:
-        """Get normalized coordinates (0-1 range) relative to image size"""
-        return {
-            'x1_norm': self.x1 / self.image_width,
-            'y1_norm': self.y1 / self.image_height,
-            'x2_norm': self.x2 / self.image_width,
-            'y2_norm': self.y2 / self.image_height,
-            'center_x_norm': self.center_x / self.image_width,
-            'center_y_norm': self.center_y / self.image_height
-        }
+        """Get normalized coordinates (0-1 range) relative to image size (memoized)"""
+        if self._normalized_coords is None:
+            frame = self._frame
+            self._normalized_coords = {
+                'x1_norm': self.x1 * frame.inv_width,
+                'y1_norm': self.y1 * frame.inv_height,
+                'x2_norm': self.x2 * frame.inv_width,
+                'y2_norm': self.y2 * frame.inv_height,
+                'center_x_norm': self.center_x * frame.inv_width,
+                'center_y_norm': self.center_y * frame.inv_height
+            }
+        return self._normalized_coords
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for easy serialization"""
-        return {
-            'class_name': self.class_name,
-            'confidence': float(self.confidence),
-            'bbox': {
-                'x1': float(self.x1),
-                'y1': float(self.y1),
-                'x2': float(self.x2),
-                'y2': float(self.y2)
-            },
-            'center': {
-                'x': float(self.center_x),
-                'y': float(self.center_y)
-            },
-            'dimensions': {
-                'width': float(self.width),
-                'height': float(self.height),
-                'area': float(self.area)
-            },
-            'corners': self.get_corners(),
-            'normalized_coords': self.get_normalized_coords()
-        }
+        """Convert to dictionary for easy serialization (memoized)"""
+        if self._dict is None:
+            self._dict = {
+                'class_name': self.class_name,
+                'confidence': self.confidence,
+                'bbox': {
+                    'x1': self.x1,
+                    'y1': self.y1,
+                    'x2': self.x2,
+                    'y2': self.y2
+                },
+                'center': {
+                    'x': self.center_x,
+                    'y': self.center_y
+                },
+                'dimensions': {
+                    'width': self.width,
+                    'height': self.height,
+                    'area': self.area
+                },
+                'corners': self.get_corners(),
+                'normalized_coords': self.get_normalized_coords()
+            }
+        return self._dict
+    
+    def to_json_bytes(self) -> bytes:
+        """Serialize to JSON bytes with orjson's C encoder.
+
+        OPT_SERIALIZE_NUMPY lets any NumPy scalars that slip into the
+        dict go straight through without Python-level casts.
+        """
+        return orjson.dumps(self.to_dict(), option=orjson.OPT_SERIALIZE_NUMPY)
     
     def __repr__(self):
         return f"DetectedObject(class='{self.class_name}', confidence={self.confidence:.2f}, bbox=({self.x1:.1f}, {self.y1:.1f}, {self.x2:.1f}, {self.y2:.1f}))"
@@ -76,6 +167,7 @@ class DetectedObject:
 def extract_detected_objects(outputs: Dict[str, Any], object_list: List[str], 
                            image_width: int, image_height: int) -> List[DetectedObject]:
     """Extract detected objects from Detic outputs and return as DetectedObject instances"""
+    import torch
     
     instances = outputs["instances"]
     detected_objects = []
@@ -84,42 +176,77 @@ def extract_detected_objects(outputs: Dict[str, Any], object_list: List[str],
     num_detections = len(instances)
     
     if num_detections == 0:
-        print("No objects detected!")
+        logger.debug("No objects detected")
         return detected_objects
     
-    # Extract data from tensors
-    pred_classes = instances.pred_classes.cpu().numpy()
-    scores = instances.scores.cpu().numpy()
-    pred_boxes = instances.pred_boxes.tensor.cpu()
+    # Pack boxes, scores and classes into one on-device tensor so a
+    # single .cpu() synchronization moves everything across PCIe,
+    # instead of three latency-bound transfers
+    packed = torch.cat([
+        instances.pred_boxes.tensor.detach(),
+        instances.scores.detach().unsqueeze(1),
+        instances.pred_classes.detach().float().unsqueeze(1),
+    ], dim=1)
+    arr = packed.cpu().numpy()
+    boxes = arr[:, :4]
+    scores = arr[:, 4]
+    pred_classes = arr[:, 5].astype(np.int64)
     
-    print(f"Found {num_detections} detected objects:")
+    # Box stats as vector ops over the whole (N, 4) array
+    wh = boxes[:, 2:4] - boxes[:, 0:2]
+    centers = (boxes[:, 0:2] + boxes[:, 2:4]) * 0.5
+    areas = wh[:, 0] * wh[:, 1]
+    
+    logger.debug("Found %d detected objects", num_detections)
+    
+    class_map = _class_map(object_list)
     
     for i in range(num_detections):
         class_idx = pred_classes[i]
         confidence = scores[i]
-        bbox = pred_boxes[i]
         
-        # Get class name
-        if object_list and class_idx < len(object_list):
-            class_name = object_list[class_idx]
-        else:
-            class_name = f"class_{class_idx}"
+        # Get class name (one dict probe; the fallback format only
+        # runs for indices outside the vocabulary)
+        class_name = class_map.get(int(class_idx)) or f"class_{class_idx}"
         
-        # Create DetectedObject instance
-        obj = DetectedObject(class_name, confidence, bbox, image_width, image_height)
+        # Create DetectedObject instance wrapping views of the shared arrays
+        obj = DetectedObject(class_name, confidence, boxes[i], image_width, image_height,
+                             stats=(wh[i, 0], wh[i, 1], centers[i, 0], centers[i, 1], areas[i]))
         detected_objects.append(obj)
         
-        print(f"  {i+1}. {obj}")
+        # Lazy %s formatting: the repr is only built when debug
+        # logging is actually enabled, keeping stdout flushes and
+        # float formatting out of the per-frame path
+        logger.debug("  %d. %s", i + 1, obj)
     
     return detected_objects
 
+def detections_to_json_bytes(detected_objects: List[DetectedObject]) -> bytes:
+    """Serialize a detection list to one JSON array for the API response.
+
+    orjson walks the dicts in C instead of json.dumps' pure-Python
+    recursion, which dominates response time once a scene has many
+    detections.
+    """
+    return orjson.dumps([obj.to_dict() for obj in detected_objects],
+                        option=orjson.OPT_SERIALIZE_NUMPY)
+
 if __name__ == "__main__":
+    import cv2
+    from Detic.pipeline import predict_pipe_line
+    
+    # Demo run: surface the per-detection debug logs on stdout
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    
     PWD = os.path.dirname(os.path.abspath(__file__))
     image_path = os.path.join(PWD, "test-imgs", "bird.jpg")  # Change to your input image path!
     object_list = ['bird']  # Change to your custom vocabulary
     
-    # Load image
-    im = cv2.imread(image_path)
+    # Load image at half resolution: libjpeg's fast IDCT scaling
+    # decodes 2-4x quicker and the detector downscales anyway. The
+    # width/height below come from the decoded shape, so the
+    # normalized-coord math stays correct.
+    im = cv2.imread(image_path, cv2.IMREAD_REDUCED_COLOR_2)
     if im is None:
         print(f"Error: Could not load image from {image_path}")
         exit(1)
@@ -165,14 +292,18 @@ if __name__ == "__main__":
     print("="*50)
     
     if detected_objects:
-        # Example: Calculate distance from image center to each object
+        # Example: Calculate distance from image center to each object,
+        # vectorized across all detections in one np.hypot call instead
+        # of a per-object Python loop (hypot also avoids intermediate
+        # overflow in the squares)
         image_center_x = image_width / 2
         image_center_y = image_height / 2
         
-        for i, obj in enumerate(detected_objects):
-            # Simple Euclidean distance from image center
-            distance_from_center = ((obj.center_x - image_center_x)**2 + 
-                                  (obj.center_y - image_center_y)**2)**0.5
+        centers_x = np.array([obj.center_x for obj in detected_objects])
+        centers_y = np.array([obj.center_y for obj in detected_objects])
+        distances = np.hypot(centers_x - image_center_x, centers_y - image_center_y)
+        
+        for i, distance_from_center in enumerate(distances):
             print(f"Object {i+1} distance from image center: {distance_from_center:.1f} pixels")
             
             # You can add your specific distance calculation algorithm here
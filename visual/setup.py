@@ -14,22 +14,39 @@ def run(cmd):
     subprocess.check_call(cmd)
 
 
-def setup_detectron2():
-    run([sys.executable, "-m", "pip", "install", "--no-build-isolation", "git+https://github.com/facebookresearch/detectron2.git"])
+def fetch_detic():
+    run(["git", "submodule", "update", "--init", "--recursive"])
 
 
-def setup_detic():
+def install_requirements():
+    # One pip invocation for both requirements files: the resolver
+    # runs once and downloads overlap. --prefer-binary skips source
+    # builds where wheels exist.
     repo = HERE / "Detic"
-    run(["git", "submodule", "update", "--init", "--recursive"])
-    run([sys.executable, "-m", "pip", "install", "-r", str(repo / 'requirements.txt')])
+    run([
+        sys.executable, "-m", "pip", "install",
+        "--prefer-binary",
+        "-r", "requirements.txt",
+        "-r", str(repo / 'requirements.txt'),
+    ])
+
+
+def install_detectron2():
+    # Separate pass on purpose: with --no-build-isolation, detectron2's
+    # setup.py imports torch at build time, so torch (from the
+    # requirements above) must already be installed before pip builds
+    # this sdist.
+    run([
+        sys.executable, "-m", "pip", "install",
+        "--no-build-isolation", "--prefer-binary",
+        "git+https://github.com/facebookresearch/detectron2.git",
+    ])
 
-def setup_requirements():
-    run([sys.executable, "-m", "pip", "install", "-r", 'requirements.txt'])
 
 def main():
-    setup_requirements()
-    setup_detectron2()
-    setup_detic()
+    fetch_detic()
+    install_requirements()
+    install_detectron2()
     print("Setup completed successfully.")
 
 